@@ -1,13 +1,20 @@
 ######################################################################################################################################################################################################
 # DZOS: DYNAMIC Z OFFSET AND SOAK
 # AUTHOR: MAKER KIT LABORATORIES
-# VERSION: 0.5.02
+# VERSION: 0.6.00
 ######################################################################################################################################################################################################
+import contextlib
+import fcntl
+import io
 import json
 import os
+import hashlib
+import logging
 import numpy as np
 import time
 import threading
+import socket
+import socketserver
 
 
 
@@ -17,6 +24,15 @@ import threading
 HOME_PATH = os.path.expanduser("~")
 STATIC_FILEPATH = os.path.join(HOME_PATH, "printer_data/config/dzos_static_data.json")
 PRINT_DATA_FILEPATH =  os.path.join(HOME_PATH, "printer_data/config/dzos_print_data.json")
+CATEGORY_FILEPATH = os.path.join(HOME_PATH, "printer_data/config/dzos_categories.json")
+PROFILE_PATH = os.path.join(HOME_PATH, "printer_data/config/dzos_profiles")
+BASE_MODEL_FILEPATH = os.path.join(PROFILE_PATH, "dzos_base_model.json")
+MODEL_HISTORY_FILENAME = "dzos_model_history.json"
+FLEET_PATH = os.path.join(HOME_PATH, "printer_data/dzos_fleet")
+FLEET_DATA_FILENAME = "dzos_fleet_data.json"
+TELEMETRY_PATH = os.path.join(HOME_PATH, "printer_data/dzos_telemetry")
+CAMPAIGN_FILENAME = "dzos_campaign.gcode"
+KLIPPY_SOCKET_PATH = os.path.join(HOME_PATH, "printer_data/comms/klippy.sock")
 ######################################################################################################################################################################################################
 
 
@@ -36,7 +52,8 @@ class DZOS:
         self.pressure_sensor = self.config.getboolean('pressure_sensor', default=False)
         self.sensor_name = self.config.get('sensor_name', default='none')
         
-        self.polynomial = self.config.getboolean('polynomial', default=False)
+        self.polynomial_enabled = self.config.getboolean('polynomial', default=False)
+        self.polynomial = self.polynomial_enabled
         self.polynomial_sample_min = self.config.getint('polynomial_sample_min', default=20)
         self.outlier_sample_min = self.config.getint('outlier_sample_min', default=20)
         self.outlier_deviation = self.config.getfloat('outlier_deviation', default=3.0)
@@ -51,14 +68,23 @@ class DZOS:
             "textured cool plate" : "tcp",
             "supertack plate" : "st",
         }
+        self.profiles = ProfileStore(PROFILE_PATH, STATIC_FILEPATH, PRINT_DATA_FILEPATH)
+        replayed = replay_journals(self.profiles.directories())
+        if replayed:
+            logging.warning(f"DZOS: Replayed {replayed} interrupted writes")
+        self.nozzle_type = self.config.get('nozzle_type', default='none')
+        self.category_ridge = self.config.getfloat('category_ridge', default=0.1, above=0.0)
+        self.categories = CategoryRegistry(CATEGORY_FILEPATH, {"bed_type": list(self.bed_type_dict.keys())})
 
         self.soak_xyz = list(self.config.getfloatlist("soak_xyz", count=3, default=[330, 20, 1]))
+        self.bed_center = list(self.config.getfloatlist("bed_center", count=2, default=[175, 175]))
 
         if self.eddy:
             probe_object = self.printer.lookup_object(f"probe_eddy_current {self.eddy_name}")
             probe_offset_x = probe_object.probe_offsets.x_offset
             probe_offset_y = probe_object.probe_offsets.y_offset
             self.probe_offset_z = 0.0
+            self.eddy_probe = probe_object
         else:
             probe_config = self.config.getsection('probe')
             probe_offset_x = probe_config.getfloat('x_offset', default=0)
@@ -68,25 +94,106 @@ class DZOS:
         self.bed_xy = list(self.config.getfloatlist("bed_xy", count=2, default=[191, 165]))
         self.pressure_nozzle_xy = list(self.config.getfloatlist("pressure_xy", count=2, default=[289, 361]))
         self.pressure_xy = [self.pressure_nozzle_xy[0] - probe_offset_x, self.pressure_nozzle_xy[1] - probe_offset_y]
+        self.probe_offset_xy = [probe_offset_x, probe_offset_y]
+
+        self.bed_surface = self.config.getchoice('bed_surface', {'none': 'none', 'grid': 'grid'}, default='none')
+        self.bed_surface_grid = self.config.getint('bed_surface_grid', default=3, minval=2, maxval=7)
+
+        self.eddy_scan = self.config.getboolean('eddy_scan', default=False) and self.eddy
+        self.eddy_scan_z = self.config.getfloat('eddy_scan_z', default=None)
+        self.eddy_scan_radius = self.config.getfloat('eddy_scan_radius', default=3.0, minval=0.0)
+        self.eddy_scan_passes = self.config.getint('eddy_scan_passes', default=2, minval=1)
+        self.eddy_scan_speed = self.config.getfloat('eddy_scan_speed', default=50.0, above=0.0)
+
+        self.telemetry_enabled = self.config.getboolean('telemetry', default=True)
+        self.telemetry_interval = self.config.getfloat('telemetry_interval', default=1.0, above=0.0)
+        self.telemetry_capacity = self.config.getint('telemetry_capacity', default=14400, minval=60)
+        self.telemetry_print_interval = self.config.getfloat('telemetry_print_interval', default=30.0, above=0.0)
+
+        self.drift_compensation = self.config.getboolean('drift_compensation', default=False)
+        self.drift_interval = self.config.getfloat('drift_interval', default=30.0, above=0.0)
+        self.drift_band = self.config.getfloat('drift_band', default=0.05, minval=0.0)
+        self.drift_rate = self.config.getfloat('drift_rate', default=0.01, above=0.0)
+        self.drift_min_step = self.config.getfloat('drift_min_step', default=0.002, minval=0.0)
+
+        self.change_point_action = self.config.getchoice('change_point_action', {'none': 'none', 'report': 'report', 'reprobe': 'reprobe', 'downweight': 'downweight'}, default='reprobe')
+        self.change_point_drift = self.config.getfloat('change_point_drift', default=0.02, minval=0.0)
+        self.change_point_threshold = self.config.getfloat('change_point_threshold', default=0.08, above=0.0)
+        self.change_point_weight = self.config.getfloat('change_point_weight', default=0.1, minval=0.0, maxval=1.0)
+
+        self.probe_reuse = self.config.getboolean('probe_reuse', default=True)
+        self.probe_reuse_age = self.config.getfloat('probe_reuse_age', default=600.0, above=0.0)
+        self.probe_reuse_radius = self.config.getfloat('probe_reuse_radius', default=25.0, above=0.0)
+        self.probe_samples = ProbeSampleStore()
+        self.probe_fresh_since = 0.0
+        self.probe_backends = {}
+        self.probe_latencies = []
+        self.reused_probe_count = 0
 
         self.gcode = self.printer.lookup_object('gcode')
         self.gcode_move = self.printer.lookup_object('gcode_move')
 
-        print_data = read_data(PRINT_DATA_FILEPATH)
-        if self.polynomial and print_data:
-            valid_print_data_count = self._check_valid_print_data(print_data)
-            self.polynomial = True if valid_print_data_count > self.polynomial_sample_min else False                    
+        self.print_start_timeline = {}
+        self._print_thread = None
+        self.print_profile_restore = None
+        self.print_geometry = geometry_features([], self.bed_center)
+        self.geometry_cache = {}
+        self.soak_engine = SoakEngine(self.printer, print_state=self._print_state)
+        self.telemetry = ThermalTelemetry(self.printer, self._read_telemetry_row, self.telemetry_interval, self.telemetry_capacity)
+        self.drift = DriftCompensator(self.printer, self._read_sensor_temperature, self._apply_drift_step, self._is_printing,
+            self.drift_interval, self.drift_band, self.drift_rate, self.drift_min_step)
+
+        self.profile_prior = self.config.getfloat('profile_prior', default=5.0, minval=0.0)
+        self._select_profile(self.config.get('profile', default='default'))
+
+        self.fleet_address = self.config.get('fleet_address', default='none')
+        self.fleet_printer_id = self.config.get('fleet_printer_id', default=socket.gethostname())
+        self.fleet_timeout = self.config.getfloat('fleet_timeout', default=2.0, above=0.0)
+        self.fleet_synced = False
+        self.fleet_models = {}
+        self.fleet_error = None
+        self.fleet_thread = None
+        self.fleet_pending = []
+        self.fleet_lock = threading.Lock()
+
+        self.model_score_alpha = self.config.getfloat('model_score_alpha', default=0.2, above=0.0, maxval=1.0)
+        self.model_min_scores = self.config.getint('model_min_scores', default=5, minval=1)
+        self.model_window = self.config.getint('model_window', default=30, minval=2)
+        self.model_history = self.config.getint('model_history', default=20, minval=1)
 
         self.gcode.register_command("DZOS_Z_OFFSET", self.cmd_DZOS_Z_OFFSET)
         self.gcode.register_command("DZOS_Z_CALCULATE", self.cmd_DZOS_Z_CALCULATE)
         self.gcode.register_command("DZOS_Z_CAPTURE", self.cmd_DZOS_Z_CAPTURE)
+        self.gcode.register_command("DZOS_CALIBRATE_CAMPAIGN", self.cmd_DZOS_CALIBRATE_CAMPAIGN)
+        self.gcode.register_command("DZOS_PROFILE", self.cmd_DZOS_PROFILE)
+        self.gcode.register_command("DZOS_MODEL", self.cmd_DZOS_MODEL)
+        webhooks = self.printer.lookup_object('webhooks')
+        webhooks.register_endpoint("dzos/soak", self._handle_soak_request)
+        self.printer.register_event_handler("klippy:connect", self._handle_connect)
+        self.printer.register_event_handler("homing:home_rails_end", self._handle_home_rails_end)
 
 
     def cmd_DZOS_Z_OFFSET(self, gcmd):
+        profile = gcmd.get("PROFILE", "").strip("'\"")
+        if profile:
+            # PROFILE= holds for this print only; the print end restores the selected profile
+            if self.print_profile_restore is None:
+                self.print_profile_restore = self.profile
+            self._select_profile(profile)
+        try:
+            self._z_offset(gcmd)
+        finally:
+            if self._print_thread is None or not self._print_thread.is_alive():
+                self._restore_profile()
+
+
+    def _z_offset(self, gcmd):
         self.cmd_DZOS_Z_CALCULATE(gcmd)        
         self._init_printer_objects()
         cache_static = int(gcmd.get("CACHE_STATIC", 0))
         input_bed_type = str(gcmd.get("BEDTYPE", "None"))
+        input_filament_type = gcmd.get("FILAMENT", "").strip("'\"") or None
+        input_nozzle_type = gcmd.get("NOZZLE", "").strip("'\"") or None
         input_bed_temperature = float(gcmd.get("BEDTEMP", 0))
         input_nozzle_temperature = float(gcmd.get("NOZZLETEMP", 0))
         if not input_bed_temperature or not input_nozzle_temperature:
@@ -119,24 +226,47 @@ class DZOS:
         if nozzle_reset == 1:
             self._nozzle_reset(gcmd)
             return            
-        if not os.path.exists(STATIC_FILEPATH) or self.pressure_xy == [0,0]:
+        if not os.path.exists(self.static_filepath) or self.pressure_xy == [0,0]:
             gcmd.respond_info("DZOS: No Static Data Found!")
             self._display_msg("DZOS: No Static!")
             return
+        if input_filament_type is None or input_nozzle_type is None:
+            gcode_materials = self._read_gcode_materials()
+            if input_filament_type is None:
+                input_filament_type = gcode_materials.get("filament_type")
+            if input_nozzle_type is None:
+                input_nozzle_type = gcode_materials.get("nozzle_type")
         gcmd.respond_info(f"DZOS: Bed Type: {input_bed_type}")
+        gcmd.respond_info(f"DZOS: Filament: {input_filament_type} Nozzle: {input_nozzle_type}")
         self._display_msg(f"DZOS: Bed {input_bed_type}")
+        self.print_geometry = self._calculate_print_geometry(gcmd)
+        if self.telemetry_enabled:
+            self.telemetry.start()
         if self.eddy:
             self._heat_soak_eddy(gcmd, input_bed_temperature, force_soak_time)
         else:
             self._heat_soak(gcmd, current_bed_temperature, input_bed_temperature, force_soak_time)
+        if self.soak_engine.state == "aborted":
+            self.telemetry.stop()
+            gcmd.respond_info("DZOS: Soak Aborted!")
+            self._display_msg("DZOS: Aborted!")
+            return
+        if (read_data(self.static_filepath) or {}).get("nozzle_reset_pending"):
+            gcmd.respond_info("DZOS: Change Pending Nozzle Reset")
+            self._nozzle_reset(gcmd)
         self._calculate_dynamic_offset(
             gcmd, 
             input_nozzle_temperature,
             input_bed_temperature, 
             input_bed_type,
-            self.polynomial,
+            self._model_polynomial(),
+            input_filament_type,
+            input_nozzle_type,
         )
-        self._print_thread = self._create_print_thread(gcmd)
+        if self.telemetry.active:
+            self.telemetry.downsample(self.telemetry_print_interval)
+        if self._print_thread is None or not self._print_thread.is_alive():
+            self._print_thread = self._create_print_thread(gcmd)
 
 
     def cmd_DZOS_Z_CALCULATE(self, gcmd):
@@ -145,66 +275,68 @@ class DZOS:
         error = False
         gcmd.respond_info("DZOS: Calculating Factors")
         self._display_msg("DZOS: Calc")   
-        print_data = read_data(PRINT_DATA_FILEPATH)
-        if print_data:
-            print_data_count = self._check_valid_print_data(print_data)
-            if print_data_count < 2:
-                error = True
-        else:
+        print_data = read_data(self.print_data_filepath) or []
+        print_data_count = self._check_valid_print_data(print_data)
+        self.polynomial = self.polynomial_enabled and print_data_count > self.polynomial_sample_min
+        fleet_model = self._fleet_model(gcmd)
+        if print_data_count < 2 and not fleet_model:
             error = True
         if error:
             gcmd.respond_info("DZOS: Not Enough Data!")
             self._display_msg("DZOS: Data!")
             return
-        if self.polynomial:
-            factor_dict = ml_polynomial_optimize(print_data, self.bed_type_dict, self.outlier_sample_min, self.outlier_deviation) 
-        else:
-            factor_dict = ml_linear_optimize(print_data, self.bed_type_dict, self.outlier_sample_min, self.outlier_deviation)
+        self.categories.observe_data(print_data)
+        base_model = fleet_model or self._fit_base_model()
+        candidates = self._fit_candidates(print_data, base_model) if print_data_count >= 2 else {}
+        static_data = read_data(self.static_filepath)
+        if (candidates or fleet_model) and not static_data:
+            gcmd.respond_info("DZOS: No Static Data Found!")
+            self._display_msg("DZOS: No Static!")
+            return                
+        model_type = self._select_champion(gcmd, static_data, candidates) if candidates else "fleet"
+        factor_dict = candidates.get(model_type, fleet_model)
         if factor_dict:
-            static_data = read_data(STATIC_FILEPATH)
-            if not static_data:
-                gcmd.respond_info("DZOS: No Static Data Found!")
-                self._display_msg("DZOS: No Static!")
-                return                
-            static_data["nozzle_factor"] = factor_dict["nozzle_factor"]
-            static_data["nozzle_temperature_factor"] = factor_dict["nozzle_temperature_factor"]
-            static_data["bed_factor"] = factor_dict["bed_factor"]
-            if self.polynomial:
-                static_data["bed_factor2"] = factor_dict["bed_factor2"]
-            static_data["bed_temperature_factor"] = factor_dict["bed_temperature_factor"]
-            if self.polynomial:
-                static_data["bed_temperature_factor2"] = factor_dict["bed_temperature_factor2"]
-            static_data["bed_type_factors"] = factor_dict["bed_type_factors"] 
-            static_data["sensor_temperature_factor"] = factor_dict["sensor_temperature_factor"]
-            if self.polynomial:
-                static_data["sensor_temperature_factor2"] = factor_dict["sensor_temperature_factor2"] 
-            static_data["offset_factor"] = factor_dict["offset_factor"]
-            static_data["statistics"] = factor_dict["statistics"]
-            write_data(STATIC_FILEPATH, static_data)
+            static_data["candidates"] = {name: model_factors(candidate) for name, candidate in candidates.items()}
+            if static_data.get("model_pinned") is None:
+                static_data.update({key: 0.0 for key in FACTOR_KEYS.values()})
+                static_data.update(factor_dict)
+                static_data["model_type"] = model_type
+                self._record_model_version(static_data)
+            write_data(self.static_filepath, static_data)
             if statistics:
-                gcmd.respond_info(f"DZOS: Type: {'Polynomial' if self.polynomial else 'Linear'}")
-                gcmd.respond_info(f"DZOS: Samples: {factor_dict['statistics']['samples']}")
-                gcmd.respond_info(f"DZOS: Outliers: {factor_dict['statistics']['outliers']} [{','.join(factor_dict['statistics']['outlier_indices'])}]")
-                gcmd.respond_info(f"DZOS: Error: ±{factor_dict['statistics']['error']:.3f}")
-                gcmd.respond_info(f"DZOS: Nozzle Z: {factor_dict['statistics']['nozzle']['mean']:.3f}")
-                gcmd.respond_info(f"DZOS: Nozzle Temperature: {factor_dict['statistics']['nozzle_temperature']['mean']:.3f}")
-                gcmd.respond_info(f"DZOS: Bed Z: {factor_dict['statistics']['bed']['mean']:.3f}")
-                if self.polynomial:
-                    gcmd.respond_info(f"DZOS: Bed² Z: {factor_dict['statistics']['bed2']['mean']:.3f}")
-                gcmd.respond_info(f"DZOS: Bed Temperature: {factor_dict['statistics']['bed_temperature']['mean']:.3f}")
-                if self.polynomial:
-                    gcmd.respond_info(f"DZOS: Bed Temperature²: {factor_dict['statistics']['bed_temperature2']['mean']:.3f}")
-                gcmd.respond_info(f"DZOS: Bed Type Default: {factor_dict['statistics']['bed_type_factor_none']['mean']:.3f}")
-                gcmd.respond_info(f"DZOS: Bed Type Cool Plate: {factor_dict['statistics']['bed_type_factor_cp']['mean']:.3f}")
-                gcmd.respond_info(f"DZOS: Bed Type High Temp Plate: {factor_dict['statistics']['bed_type_factor_ht']['mean']:.3f}")
-                gcmd.respond_info(f"DZOS: Bed Type Engineering Plate: {factor_dict['statistics']['bed_type_factor_eng']['mean']:.3f}")
-                gcmd.respond_info(f"DZOS: Bed Type Textured PEI Plate: {factor_dict['statistics']['bed_type_factor_pei']['mean']:.3f}")
-                gcmd.respond_info(f"DZOS: Bed Type Textured Cool Plate: {factor_dict['statistics']['bed_type_factor_tcp']['mean']:.3f}")
-                gcmd.respond_info(f"DZOS: Bed Type Supertack Plate: {factor_dict['statistics']['bed_type_factor_st']['mean']:.3f}")
-                gcmd.respond_info(f"DZOS: Sensor Temperature: {factor_dict['statistics']['sensor_temperature']['mean']:.3f}")
-                if self.polynomial:
-                    gcmd.respond_info(f"DZOS: Sensor Temperature²: {factor_dict['statistics']['sensor_temperature2']['mean']:.3f}")
-                gcmd.respond_info(f"DZOS: Offset: {factor_dict['statistics']['offset']['mean']:.3f}")
+                model_statistics = factor_dict['statistics']
+                pinned = static_data.get("model_pinned") is not None
+                if pinned:
+                    # report the pinned model that predicts, not the champion fitted alongside it
+                    active_polynomial = any(static_data.get(FACTOR_KEYS[feature]) for feature in ("bed2", "bed_temperature2", "sensor_temperature2"))
+                    active_statistics = ml_model_statistics(static_data, print_data, self.categories.levels(), active_polynomial)
+                    if active_statistics:
+                        model_statistics = active_statistics
+                    else:
+                        gcmd.respond_info(f"DZOS: Statistics Of Candidate {model_type}, Not The Pinned Model")
+                polynomial = "bed2" in model_statistics
+                gcmd.respond_info(f"DZOS: Profile: {self.profile}{' (Fleet Prior)' if fleet_model else ' (Base Prior)' if base_model else ''}")
+                gcmd.respond_info(f"DZOS: Model: {static_data.get('model_type')} v{static_data.get('model_version', 0)}{' (Pinned)' if pinned else ''}")
+                gcmd.respond_info(f"DZOS: Type: {'Polynomial' if polynomial else 'Linear'}")
+                gcmd.respond_info(f"DZOS: Samples: {model_statistics['samples']}")
+                gcmd.respond_info(f"DZOS: Outliers: {model_statistics['outliers']} [{','.join(model_statistics['outlier_indices'])}]")
+                gcmd.respond_info(f"DZOS: Error: ±{model_statistics['error']:.3f}")
+                gcmd.respond_info(f"DZOS: Nozzle Z: {model_statistics['nozzle']['mean']:.3f}")
+                gcmd.respond_info(f"DZOS: Nozzle Temperature: {model_statistics['nozzle_temperature']['mean']:.3f}")
+                gcmd.respond_info(f"DZOS: Bed Z: {model_statistics['bed']['mean']:.3f}")
+                if polynomial:
+                    gcmd.respond_info(f"DZOS: Bed² Z: {model_statistics['bed2']['mean']:.3f}")
+                gcmd.respond_info(f"DZOS: Bed Local Z: {model_statistics['bed_local']['mean']:.3f}")
+                gcmd.respond_info(f"DZOS: Bed Temperature: {model_statistics['bed_temperature']['mean']:.3f}")
+                if polynomial:
+                    gcmd.respond_info(f"DZOS: Bed Temperature²: {model_statistics['bed_temperature2']['mean']:.3f}")
+                for kind, category_statistics in model_statistics['categories'].items():
+                    for name, category_stat in category_statistics.items():
+                        gcmd.respond_info(f"DZOS: {kind.replace('_', ' ').title()} {name}: {category_stat['mean']:.3f}")
+                gcmd.respond_info(f"DZOS: Sensor Temperature: {model_statistics['sensor_temperature']['mean']:.3f}")
+                if polynomial:
+                    gcmd.respond_info(f"DZOS: Sensor Temperature²: {model_statistics['sensor_temperature2']['mean']:.3f}")
+                gcmd.respond_info(f"DZOS: Offset: {model_statistics['offset']['mean']:.3f}")
             else:
                 self._set_z_offset(0.0)
         else:
@@ -221,17 +353,402 @@ class DZOS:
         gcode_position = self.gcode_move._get_gcode_position()
         z = gcode_position[2]
         z_offset = z - (z_position - self.probe_offset_z)
+        drift_log, drift_applied = self.drift.disarm()
+        z_offset += drift_applied
         gcmd.respond_info(f"DZOS: Captured Z: {-z_offset:.3f}")
-        print_data: list[dict] = read_data(PRINT_DATA_FILEPATH)
+        print_data: list[dict] = read_data(self.print_data_filepath)
         if not print_data:
             return
         if not print_data[-1].get("z_offset", None):
             print_data[-1]["z_offset"] = z_offset
             print_data[-1]["timestamp"] = time.time()
-            write_data(PRINT_DATA_FILEPATH, print_data)
+            if drift_log:
+                print_data[-1]["drift_applied"] = drift_applied
+                print_data[-1]["drift_log"] = drift_log
+            if self.telemetry.active:
+                self.telemetry.stop()
+                telemetry_filepath = os.path.join(TELEMETRY_PATH, f"dzos_telemetry_{int(print_data[-1]['timestamp'])}.npy")
+                if self.telemetry.save(telemetry_filepath):
+                    print_data[-1]["telemetry_file"] = os.path.basename(telemetry_filepath)
+            self._update_change_point(gcmd, print_data)
+            self._score_candidates(gcmd, print_data[-1])
+            write_data(self.print_data_filepath, print_data)
+            self._fleet_push(print_data if not self.fleet_synced else print_data[-1:])
             self.cmd_DZOS_Z_CALCULATE(gcmd)
 
 
+    def _fit_candidates(self, print_data: list, base_model: dict) -> dict:
+        levels = self.categories.levels()
+        captured_data = [entry for entry in print_data if entry.get("z_offset") is not None]
+        candidates = {
+            "linear": ml_linear_optimize(print_data, levels, self.outlier_sample_min, self.outlier_deviation, self.category_ridge, base_model, self.profile_prior),
+            "robust": ml_linear_optimize(print_data, levels, 3, min(self.outlier_deviation, 2.0), self.category_ridge, base_model, self.profile_prior),
+            "windowed": ml_linear_optimize(captured_data[-self.model_window:], levels, self.outlier_sample_min, self.outlier_deviation, self.category_ridge, base_model, self.profile_prior),
+        }
+        if self.polynomial:
+            candidates["polynomial"] = ml_polynomial_optimize(print_data, levels, self.outlier_sample_min, self.outlier_deviation, self.category_ridge, base_model, self.profile_prior)
+        return {name: candidate for name, candidate in candidates.items() if candidate}
+
+
+    def _select_champion(self, gcmd, static_data: dict, candidates: dict) -> str:
+        default = "polynomial" if "polynomial" in candidates else "linear"
+        champion = static_data.get("model_type")
+        if champion not in candidates:
+            champion = default
+        scores = {
+            name: score["error"] for name, score in static_data.get("model_scores", {}).items()
+            if name in candidates and score["count"] >= self.model_min_scores
+        }
+        if scores:
+            best = min(scores, key=scores.get)
+            # a challenger must beat the champion by 10% so near-ties do not flip the model every print
+            if champion not in scores or scores[best] < 0.9 * scores[champion]:
+                if best != champion:
+                    gcmd.respond_info(f"DZOS: Model Promoted: {best} ±{scores[best]:.3f} over {champion}")
+                champion = best
+        return champion
+
+
+    def _score_candidates(self, gcmd, entry: dict):
+        candidate_predictions = entry.get("candidate_predictions")
+        if not candidate_predictions:
+            return
+        static_data = read_data(self.static_filepath)
+        if not static_data:
+            return
+        scores = static_data.setdefault("model_scores", {})
+        for name, prediction in candidate_predictions.items():
+            error = abs(entry["z_offset"] - prediction)
+            score = scores.setdefault(name, {"error": error, "count": 0})
+            score["error"] += self.model_score_alpha * (error - score["error"])
+            score["count"] += 1
+        gcmd.respond_info("DZOS: Model Scores: " + " ".join(f"{name} ±{score['error']:.3f}" for name, score in sorted(scores.items())))
+        write_data(self.static_filepath, static_data)
+
+
+    def _record_model_version(self, static_data: dict):
+        history = read_data(self.model_history_filepath)
+        if history is None and os.path.exists(self.model_history_filepath):
+            return
+        history = history or []
+        factors = model_factors(static_data)
+        if history and history[-1]["factors"] == factors and history[-1]["model_type"] == static_data["model_type"]:
+            return
+        version = history[-1]["version"] + 1 if history else 1
+        history.append({"version": version, "timestamp": time.time(), "model_type": static_data["model_type"], "factors": factors})
+        write_data(self.model_history_filepath, history[-self.model_history:])
+        static_data["model_version"] = version
+
+
+    def cmd_DZOS_MODEL(self, gcmd):
+        rollback = gcmd.get_int("ROLLBACK", None)
+        auto = gcmd.get_int("AUTO", 0)
+        static_data = read_data(self.static_filepath)
+        if not static_data:
+            raise gcmd.error("DZOS: No Static Data Found!")
+        history = read_data(self.model_history_filepath) or []
+        if rollback is not None:
+            versions = {entry["version"]: entry for entry in history}
+            if rollback not in versions:
+                raise gcmd.error(f"DZOS: Unknown Model Version {rollback}")
+            static_data.update({key: 0.0 for key in FACTOR_KEYS.values()})
+            static_data.update(versions[rollback]["factors"])
+            static_data["model_type"] = versions[rollback]["model_type"]
+            static_data["model_version"] = rollback
+            static_data["model_pinned"] = rollback
+            write_data(self.static_filepath, static_data)
+            gcmd.respond_info(f"DZOS: Model Rolled Back To v{rollback}, Pinned Until AUTO=1")
+        elif auto:
+            static_data["model_pinned"] = None
+            write_data(self.static_filepath, static_data)
+            gcmd.respond_info("DZOS: Model Promotion Automatic")
+        for entry in history:
+            active = "*" if entry["version"] == static_data.get("model_version") else " "
+            gcmd.respond_info(f"DZOS: {active} v{entry['version']} {entry['model_type']} {time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['timestamp']))}")
+        for name, score in sorted(static_data.get("model_scores", {}).items()):
+            gcmd.respond_info(f"DZOS: {name}: ±{score['error']:.3f} over {score['count']} prints")
+
+
+    def _fleet_push(self, records: list):
+        # only queue here; the fleet thread sends it so a slow or dead service never stalls the reactor
+        if self.fleet_address == 'none':
+            return
+        records = [record for record in records if record.get("z_offset") is not None and record.get("timestamp")]
+        with self.fleet_lock:
+            self.fleet_pending.extend(records)
+        self.fleet_synced = True
+        self._fleet_refresh()
+
+
+    def _fleet_model(self, gcmd) -> dict:
+        # the pull runs in a background thread; CALCULATE only reads the last model it cached
+        if self.fleet_address == 'none':
+            return None
+        fleet_model = self.fleet_models.get(self.polynomial)
+        if fleet_model is None and self.fleet_error:
+            gcmd.respond_info(f"DZOS: Fleet Unavailable! {self.fleet_error}")
+        self._fleet_refresh()
+        return fleet_model
+
+
+    def _fleet_refresh(self):
+        if self.fleet_address == 'none' or (self.fleet_thread is not None and self.fleet_thread.is_alive()):
+            return
+        self.fleet_thread = threading.Thread(target=self._fleet_sync, daemon=True)
+        self.fleet_thread.start()
+
+
+    def _fleet_sync(self):
+        # runs in the fleet thread: send the queued captures, then pull the model for the current polynomial setting
+        while True:
+            with self.fleet_lock:
+                records, self.fleet_pending = self.fleet_pending, []
+            if records and not self._fleet_send(records):
+                with self.fleet_lock:
+                    self.fleet_pending[:0] = records
+                return
+            self._fleet_pull(self.polynomial)
+            with self.fleet_lock:
+                if not self.fleet_pending:
+                    return
+
+
+    def _fleet_send(self, records: list) -> bool:
+        try:
+            response = fleet_request(self.fleet_address, {"op": "push", "printer": self.fleet_printer_id, "records": records}, self.fleet_timeout)
+        except (OSError, ValueError) as error:
+            self.fleet_error = str(error)
+            logging.warning(f"DZOS: Fleet Unavailable! {error}")
+            return False
+        logging.info(f"DZOS: Fleet Push: {response.get('added', 0)} new of {response.get('samples', 0)}")
+        return True
+
+
+    def _fleet_pull(self, polynomial: bool):
+        try:
+            response = fleet_request(self.fleet_address, {"op": "pull", "printer": self.fleet_printer_id, "polynomial": polynomial}, self.fleet_timeout)
+        except (OSError, ValueError) as error:
+            self.fleet_error = str(error)
+            logging.warning(f"DZOS: Fleet Unavailable! {error}")
+            return
+        self.fleet_error = None
+        self.fleet_models = {**self.fleet_models, polynomial: response.get("model")}
+
+
+    def _update_change_point(self, gcmd, print_data: list):
+        predicted_z_offset = print_data[-1].get("predicted_z_offset")
+        if predicted_z_offset is None or self.change_point_action == "none":
+            return
+        static_data = read_data(self.static_filepath)
+        if not static_data:
+            return
+        state = static_data.get("change_point") or change_point_state()
+        alarm = change_point_update(state, print_data[-1]["z_offset"] - predicted_z_offset, self.change_point_drift, self.change_point_threshold)
+        if alarm:
+            gcmd.respond_info(f"DZOS: Change Detected! Step: {alarm['step']:+.3f} over {alarm['samples']} prints")
+            self._display_msg("DZOS: Change!")
+            alarm["timestamp"] = print_data[-1].get("timestamp")
+            alarm["action"] = self.change_point_action
+            state["alarms"] = (state.get("alarms", []) + [alarm])[-10:]
+            if self.change_point_action == "reprobe":
+                static_data["nozzle_reset_pending"] = True
+            elif self.change_point_action == "downweight":
+                for entry in print_data[:-alarm["samples"]]:
+                    entry["weight"] = entry.get("weight", 1.0) * self.change_point_weight
+        static_data["change_point"] = state
+        write_data(self.static_filepath, static_data)
+
+
+    def cmd_DZOS_CALIBRATE_CAMPAIGN(self, gcmd):
+        self._init_printer_objects()
+        bed_temperatures = self._parse_temperatures(gcmd, "BED_TEMPS", "55,65,80")
+        nozzle_temperatures = self._parse_temperatures(gcmd, "NOZZLE_TEMPS", "200,220,240")
+        plates = [plate.strip() for plate in gcmd.get("PLATES", "Textured PEI Plate").split(",")]
+        soak_time = gcmd.get_int("SOAK", 300, minval=1)
+        max_points = gcmd.get_int("POINTS", 0, minval=0)
+        pattern = gcmd.get("PATTERN", "dzos_test_combined.gcode")
+        start = gcmd.get_int("START", 1)
+        for plate in plates:
+            self.categories.observe("bed_type", plate)
+        if not os.path.exists(self.static_filepath):
+            raise gcmd.error("DZOS: No Static Data Found! Run DZOS_INIT_SETUP first.")
+        gcode_path = self.printer.lookup_object('virtual_sdcard').sdcard_dirname
+        pattern_block = campaign_pattern(os.path.join(gcode_path, pattern))
+        if pattern_block is None:
+            raise gcmd.error(f"DZOS: Pattern {pattern} has no test print block")
+        candidates = [(plate, bed, nozzle) for plate in plates for bed in bed_temperatures for nozzle in nozzle_temperatures]
+        eventtime = self.printer.get_reactor().monotonic()
+        current = (
+            self.heaters.lookup_heater("heater_bed").get_temp(eventtime)[0],
+            self.heaters.lookup_heater("extruder").get_temp(eventtime)[0],
+        )
+        order = campaign_plan(candidates, read_data(self.print_data_filepath) or [], self.categories.levels()["bed_type"], current)
+        if max_points:
+            order = order[:max_points]
+        plan = [candidates[index] for index in order]
+        write_gcode(os.path.join(gcode_path, CAMPAIGN_FILENAME), campaign_gcode(plan, pattern_block, soak_time))
+        gcmd.respond_info(f"DZOS: Campaign {len(plan)} points")
+        for index, (plate, bed, nozzle) in enumerate(plan):
+            gcmd.respond_info(f"DZOS: {index + 1}: {plate} Bed {bed} Nozzle {nozzle}")
+        if start:
+            self.gcode.run_script_from_command(f"M23 /{CAMPAIGN_FILENAME}\nM24")
+
+
+    def _parse_temperatures(self, gcmd, name: str, default: str) -> list:
+        try:
+            temperatures = [int(float(value)) for value in gcmd.get(name, default).split(",") if value.strip()]
+        except ValueError:
+            raise gcmd.error(f"DZOS: {name} must be a comma separated list of temperatures")
+        if not temperatures or any(temperature <= 0 for temperature in temperatures):
+            raise gcmd.error(f"DZOS: {name} must be a comma separated list of temperatures")
+        return temperatures
+
+
+    def _handle_connect(self):
+        probe_names = {"probe": "probe", "probe_pressure": "probe_pressure"}
+        if self.eddy:
+            probe_names["eddy"] = f"probe_eddy_current {self.eddy_name}"
+        for name, object_name in probe_names.items():
+            probe_object = self.printer.lookup_object(object_name, None)
+            if probe_object is not None:
+                self.probe_backends[name] = ProbeBackend(self.printer, name, probe_object)
+        self._fleet_refresh()
+        if not self.probe_reuse:
+            return
+        qgl = self.printer.lookup_object('quad_gantry_level', None)
+        self._subscribe_probe_helper(getattr(qgl, "probe_helper", None), "qgl")
+        bed_mesh_calibrate = getattr(self.printer.lookup_object('bed_mesh', None), "bmc", None)
+        probe_manager = getattr(bed_mesh_calibrate, "probe_mgr", None)
+        mesh_probe_helper = getattr(probe_manager, "probe_helper", None) or getattr(bed_mesh_calibrate, "probe_helper", None)
+        self._subscribe_probe_helper(mesh_probe_helper, "bed_mesh")
+
+
+    def _subscribe_probe_helper(self, probe_helper, source: str):
+        finalize_callback = getattr(probe_helper, "finalize_callback", None)
+        if finalize_callback is None:
+            return
+        def finalize(*args):
+            # QGL calls this once per retry; only the iteration that ends the retries describes the final gantry
+            result = finalize_callback(*args)
+            if result == "retry":
+                self.probe_samples.discard(source)
+            else:
+                self.probe_samples.add(args[-1], source, self.printer.get_reactor().monotonic())
+            return result
+        probe_helper.finalize_callback = finalize
+
+
+    def _handle_home_rails_end(self, homing_state, rails):
+        if 2 in homing_state.get_axes():
+            self.probe_samples.clear()
+
+
+    def _reuse_probe_z(self, x: float, y: float, radius: float=None, interpolate: bool=True):
+        if not self.probe_reuse:
+            return None
+        # samples taken before the soak ended describe a bed that has since changed shape
+        eventtime = self.printer.get_reactor().monotonic()
+        min_time = max(eventtime - self.probe_reuse_age, self.probe_fresh_since)
+        return self.probe_samples.estimate(x, y, radius or self.probe_reuse_radius, min_time, self.bed_center, interpolate)
+
+
+    def cmd_DZOS_PROFILE(self, gcmd):
+        self._init_printer_objects()
+        name = gcmd.get("NAME", None)
+        if name:
+            self.print_profile_restore = None
+            self._select_profile(name)
+            if gcmd.get_int("SAVE", 0):
+                self.global_configfile.set(self.config_name, "profile", self.profile)
+            self._display_msg(f"DZOS: {self.profile}")
+            gcmd.respond_info(f"DZOS: Profile: {self.profile}")
+            return
+        for profile in self.profiles.names():
+            print_data = read_data(self.profiles.paths(profile)[1]) or []
+            active = "*" if profile == self.profile else " "
+            gcmd.respond_info(f"DZOS: {active} {profile}: {self._check_valid_print_data(print_data)} samples")
+
+
+    def _select_profile(self, name: str):
+        # only paths change here; the polynomial choice follows the sample count on the next calculate
+        self.profile = profile_name(name)
+        self.static_filepath, self.print_data_filepath = self.profiles.create(self.profile)
+        self.model_history_filepath = os.path.join(os.path.dirname(self.static_filepath), MODEL_HISTORY_FILENAME)
+
+
+    def _restore_profile(self):
+        if self.print_profile_restore is not None:
+            self._select_profile(self.print_profile_restore)
+            self.print_profile_restore = None
+
+
+    def _model_polynomial(self) -> bool:
+        static_data = read_data(self.static_filepath) or {}
+        if "model_type" not in static_data:
+            return self.polynomial
+        return any(static_data.get(FACTOR_KEYS[feature]) for feature in ("bed2", "bed_temperature2", "sensor_temperature2"))
+
+
+    def _fit_base_model(self) -> dict:
+        if not self.profile_prior:
+            return None
+        pooled_data = self.profiles.pooled_print_data(exclude=self.profile)
+        if self._check_valid_print_data(pooled_data) < 2:
+            return None
+        self.categories.observe_data(pooled_data)
+        base_model = ml_categorical_optimize(pooled_data, self.categories.levels(), self.outlier_sample_min, self.outlier_deviation, self.polynomial, self.category_ridge)
+        if base_model and os.path.isdir(PROFILE_PATH):
+            write_data(BASE_MODEL_FILEPATH, base_model)
+        return base_model
+
+
+    def _handle_soak_request(self, web_request):
+        action = web_request.get_str("action", "status").upper()
+        extend = web_request.get_float("extend", 0.0)
+        try:
+            self._soak_action(action, extend)
+        except ValueError as error:
+            raise web_request.error(str(error))
+        web_request.send(self.soak_engine.get_status(self.printer.get_reactor().monotonic()))
+
+
+    def _soak_action(self, action: str, extend: float):
+        if extend:
+            self.soak_engine.extend(extend)
+        if action == "PAUSE":
+            self.soak_engine.pause()
+        elif action == "RESUME":
+            self.soak_engine.resume()
+        elif action == "SKIP":
+            self.soak_engine.skip()
+        elif action != "STATUS":
+            raise ValueError(f"DZOS: Unknown Soak Action {action}")
+
+
+    def _print_state(self) -> str:
+        if self.printer.is_shutdown():
+            return "cancelled"
+        print_stats = self.printer.lookup_object('print_stats', None)
+        if print_stats is not None and print_stats.get_status(self.printer.get_reactor().monotonic())["state"] in ("cancelled", "error"):
+            return "cancelled"
+        pause_resume = self.printer.lookup_object('pause_resume', None)
+        virtual_sd = self.printer.lookup_object('virtual_sdcard', None)
+        if getattr(pause_resume, "is_paused", False) or getattr(virtual_sd, "must_pause_work", False):
+            return "paused"
+        return "printing"
+
+
+    def get_status(self, eventtime):
+        return {
+            "enabled": self.dzos_enabled,
+            "profile": self.profile,
+            "print_start": self.print_start_timeline,
+            "soak": self.soak_engine.get_status(eventtime),
+            "drift": self.drift.get_status(eventtime),
+            "probe": {name: backend.get_status(eventtime) for name, backend in self.probe_backends.items()},
+        }
+
+
     def _init_printer_objects(self):
         self.toolhead = self.printer.lookup_object('toolhead')
         self.probe_object = self.printer.lookup_object('probe') 
@@ -247,7 +764,7 @@ class DZOS:
 
 
     def _init_static_data(self):
-        static_data = read_data(STATIC_FILEPATH)
+        static_data = read_data(self.static_filepath)
         if not static_data:
             static_data = {}
         self.static_e_pressure_nozzle = static_data.get("e_pressure_nozzle_z", 0)
@@ -255,9 +772,12 @@ class DZOS:
         self.static_nozzle_temperature_factor = static_data.get("nozzle_temperature_factor", 0)
         self.static_bed_factor = static_data.get("bed_factor", 0)
         self.static_bed_factor2 = static_data.get("bed_factor2", 0)
+        self.static_bed_local_factor = static_data.get("bed_local_factor", 0)
         self.static_bed_temperature_factor = static_data.get("bed_temperature_factor", 0)
         self.static_bed_temperature_factor2 = static_data.get("bed_temperature_factor2", 0)
         self.static_bed_type_factors = static_data.get("bed_type_factors", {})
+        self.static_filament_type_factors = static_data.get("filament_type_factors", {})
+        self.static_nozzle_type_factors = static_data.get("nozzle_type_factors", {})
         self.static_offset_factor = static_data.get("offset_factor", 0)
         self.static_sensor_temperature_factor = static_data.get("sensor_temperature_factor", 0)
         self.static_sensor_temperature_factor2 = static_data.get("sensor_temperature_factor2", 0)
@@ -267,129 +787,246 @@ class DZOS:
         self._display_msg("DZOS: Caching..")
         gcmd.respond_info("DZOS: Caching..")
 
-        backup_file(STATIC_FILEPATH)
-        backup_file(PRINT_DATA_FILEPATH)
-        delete_file(STATIC_FILEPATH)
-        delete_file(PRINT_DATA_FILEPATH)
-
-        self._generic_z_probe(gcmd, self.probe_object, x=self.pressure_xy[0], y=self.pressure_xy[1])
-        b_pressure_z = self._generic_z_probe(gcmd, self.probe_object, x=self.pressure_xy[0], y=self.pressure_xy[1])
-        self._set_z_zero(b_pressure_z)
-        
-        self._generic_z_probe(gcmd, self.probe_pressure_object, x=self.pressure_nozzle_xy[0], y=self.pressure_nozzle_xy[1])
-        e_pressure_nozzle = self._generic_z_probe(gcmd, self.probe_pressure_object, x=self.pressure_nozzle_xy[0], y=self.pressure_nozzle_xy[1])
-        
-        self._generic_z_probe(gcmd, self.probe_object, x=self.bed_xy[0], y=self.bed_xy[1])
-        e_bed_z = self._generic_z_probe(gcmd, self.probe_object, x=self.bed_xy[0], y=self.bed_xy[1]) 
+        # every probe is read in the starting frame, the first sample at each point is a settling probe
+        probe_z = self._probe_points(gcmd, "probe", [self.pressure_xy, self.pressure_xy, self.bed_xy, self.bed_xy])
+        pressure_z = self._probe_points(gcmd, "probe_pressure", [self.pressure_nozzle_xy, self.pressure_nozzle_xy])
+        b_pressure_z = probe_z[1]
+        e_pressure_nozzle = float(pressure_z[1] - b_pressure_z)
+        e_bed_z = float(probe_z[3])
         self._set_z_zero(e_bed_z)
 
         data_dict = {
             "e_pressure_nozzle_z": e_pressure_nozzle,
         }
-        write_data(STATIC_FILEPATH, data_dict)
+        backup_file(self.static_filepath)
+        backup_file(self.print_data_filepath)
+        write_data(self.static_filepath, data_dict)
 
 
     def _nozzle_reset(self, gcmd):
         self._display_msg("DZOS: Nozzle..")
         gcmd.respond_info("DZOS: Nozzle Reset..")
+        static_data = read_data(self.static_filepath)
+        if static_data is None and os.path.exists(self.static_filepath):
+            gcmd.respond_info("DZOS: Static Data Unreadable! See klippy.log")
+            self._display_msg("DZOS: Static!")
+            return
         
-        d_pressure_z_s1 = self._generic_z_probe(gcmd, self.probe_object, x=self.pressure_xy[0], y=self.pressure_xy[1])
-        d_pressure_z_s2 = self._generic_z_probe(gcmd, self.probe_object, x=self.pressure_xy[0], y=self.pressure_xy[1])
-        d_pressure_z = (d_pressure_z_s1 + d_pressure_z_s2) / 2.0
+        d_pressure_z = float(np.mean(self._probe_points(gcmd, "probe", [self.pressure_xy, self.pressure_xy])))
+        pressure_z = self._probe_points(gcmd, "probe_pressure", [self.pressure_nozzle_xy, self.pressure_nozzle_xy])
+        e_pressure_nozzle = float(pressure_z[1] - d_pressure_z)
         self._set_z_zero(d_pressure_z)
-        
-        self._generic_z_probe(gcmd, self.probe_pressure_object, x=self.pressure_nozzle_xy[0], y=self.pressure_nozzle_xy[1])
-        e_pressure_nozzle = self._generic_z_probe(gcmd, self.probe_pressure_object, x=self.pressure_nozzle_xy[0], y=self.pressure_nozzle_xy[1])
 
-        data_dict = {
-            "e_pressure_nozzle_z": e_pressure_nozzle,
-        }
-        write_data(STATIC_FILEPATH, data_dict)
+        static_data = static_data or {}
+        static_data["e_pressure_nozzle_z"] = e_pressure_nozzle
+        static_data["change_point"] = change_point_state()
+        static_data.pop("nozzle_reset_pending", None)
+        write_data(self.static_filepath, static_data)
         self.cmd_DZOS_Z_CALCULATE(gcmd)
 
 
-    def _calculate_dynamic_offset(self, gcmd, nozzle_temperature, bed_temperature, bed_type, polynomial):
+    def _calculate_dynamic_offset(self, gcmd, nozzle_temperature, bed_temperature, bed_type, polynomial, filament_type=None, nozzle_type=None):
         self._display_msg("DZOS: Calc")
 
-        initial_z = self._generic_z_probe(gcmd, self.probe_object, x=self.bed_xy[0], y=self.bed_xy[1])
-        self._set_z_zero(initial_z)
-
-        d_pressure_z_s1 = self._generic_z_probe(gcmd, self.probe_object, x=self.pressure_xy[0], y=self.pressure_xy[1])
-        d_pressure_z_s2 = self._generic_z_probe(gcmd, self.probe_object, x=self.pressure_xy[0], y=self.pressure_xy[1])
-        d_pressure_z = (d_pressure_z_s1 + d_pressure_z_s2) / 2.0
-        self._set_z_zero(d_pressure_z)
-        
-        d_bed_z_s1 = self._generic_z_probe(gcmd, self.probe_object, x=self.bed_xy[0], y=self.bed_xy[1])
-        d_bed_z_s2 = self._generic_z_probe(gcmd, self.probe_object, x=self.bed_xy[0], y=self.bed_xy[1])
-        d_bed_z = (d_bed_z_s1 + d_bed_z_s2) / 2.0
-        self._set_z_zero(d_bed_z)
-        
-        event_time = self.printer.get_reactor().monotonic()
-        if self.eddy:
-            sensor_status = self.printer.lookup_object(f'temperature_probe {self.sensor_name}').get_status(event_time)
-            sensor_temperature = sensor_status.get('temperature')
-        elif self.sensor_name != 'none':
-            sensor_status = self.printer.lookup_object(f'temperature_sensor {self.sensor_name}').get_status(event_time)
-            sensor_temperature = sensor_status.get('temperature')
+        self.reused_probe_count = 0
+        self.probe_latencies = []
+        initial_z = self._reuse_probe_z(self.bed_xy[0], self.bed_xy[1])
+        if initial_z is not None:
+            self.reused_probe_count += 1
+            gcmd.respond_info("DZOS: Reused Bed Z: %.3f" % initial_z)
+            self._set_z_zero(initial_z)
+
+        pressure_scan = None
+        if self.eddy_scan:
+            if initial_z is None:
+                initial_z = self._probe_points(gcmd, "probe", [self.bed_xy])[0]
+                self._set_z_zero(initial_z)
+            pressure_scan = self._eddy_scan_z(gcmd, x=self.pressure_xy[0], y=self.pressure_xy[1])
+        bed_scan = self._eddy_scan_z(gcmd, x=self.bed_xy[0], y=self.bed_xy[1]) if pressure_scan else None
+        if bed_scan:
+            d_pressure_z = pressure_scan["z"]
+            d_bed_z = bed_scan["z"] - pressure_scan["z"]
+            self._set_z_zero(bed_scan["z"])
+            gcmd.respond_info("DZOS: Eddy Scan: %i/%i samples ±%.4f/±%.4f" % (pressure_scan["samples"], bed_scan["samples"], pressure_scan["spread"], bed_scan["spread"]))
         else:
-            sensor_temperature = 0.0
+            # one session for all points; results share the starting frame, so the zero shift is applied once at the end
+            probe_initial = initial_z is None
+            points = ([self.bed_xy] if probe_initial else []) + [self.pressure_xy, self.pressure_xy, self.bed_xy, self.bed_xy]
+            probe_z = self._probe_points(gcmd, "probe", points)
+            if probe_initial:
+                initial_z, probe_z = probe_z[0], probe_z[1:]
+            pressure_z = float(np.mean(probe_z[:2]))
+            bed_z = float(np.mean(probe_z[2:]))
+            d_pressure_z = pressure_z - (initial_z if probe_initial else 0.0)
+            d_bed_z = bed_z - pressure_z
+            self._set_z_zero(bed_z)
+
+        bed_surface = self._fit_bed_surface(gcmd)
+        if bed_surface is not None:
+            bed_point = [self.bed_xy[0] + self.probe_offset_xy[0], self.bed_xy[1] + self.probe_offset_xy[1]]
+            centroid = self.print_geometry["centroid"]
+            d_bed_z_local = d_bed_z + float(ml_surface_evaluate(bed_surface, centroid[0], centroid[1], self.bed_center) - ml_surface_evaluate(bed_surface, bed_point[0], bed_point[1], self.bed_center))
+            gcmd.respond_info("DZOS: Bed Z At Centroid: %.3f" % d_bed_z_local)
+        else:
+            d_bed_z_local = d_bed_z
+        
+        sensor_temperature = self._read_sensor_temperature(self.printer.get_reactor().monotonic())
 
+        filament_type = self.categories.observe("filament_type", filament_type)
+        nozzle_type = self.categories.observe("nozzle_type", nozzle_type)
         if polynomial:
-            z_offset = self._calculate_z_offset_polynomial(d_bed_z, nozzle_temperature, bed_temperature, bed_type, sensor_temperature)
+            z_offset = self._calculate_z_offset_polynomial(d_bed_z, nozzle_temperature, bed_temperature, bed_type, sensor_temperature, filament_type, nozzle_type, d_bed_z_local - d_bed_z)
         else:   
-            z_offset = self._calculate_z_offset(d_bed_z, nozzle_temperature, bed_temperature, bed_type, sensor_temperature)
+            z_offset = self._calculate_z_offset(d_bed_z, nozzle_temperature, bed_temperature, bed_type, sensor_temperature, filament_type, nozzle_type, d_bed_z_local - d_bed_z)
         print_data = self._create_data_dict(d_bed_z, d_pressure_z, nozzle_temperature, bed_temperature, bed_type, sensor_temperature)
-        append_data(PRINT_DATA_FILEPATH, print_data)
+        print_data["filament_type"] = filament_type
+        print_data["nozzle_type"] = nozzle_type
+        print_data["reused_probes"] = self.reused_probe_count
+        if self.probe_latencies:
+            print_data["probe_latencies"] = [round(latency, 3) for latency in self.probe_latencies]
+        if self.static_bed_factor:
+            print_data["predicted_z_offset"] = -z_offset
+        if self.telemetry.active:
+            print_data["telemetry"] = self.telemetry.summary()
+        if bed_scan:
+            print_data["d_pressure_z_spread"] = pressure_scan["spread"]
+            print_data["d_bed_z_spread"] = bed_scan["spread"]
+            print_data["eddy_samples"] = pressure_scan["samples"] + bed_scan["samples"]
+        if bed_surface is not None:
+            print_data["d_bed_z_local"] = d_bed_z_local
+            print_data["bed_surface"] = [float(coefficient) for coefficient in bed_surface]
+        candidates = (read_data(self.static_filepath) or {}).get("candidates", {})
+        if candidates:
+            print_data["candidate_predictions"] = {name: ml_predict(candidate, print_data) for name, candidate in candidates.items()}
+        append_data(self.print_data_filepath, print_data)
 
         gcmd.respond_info("DZOS: Z Offset: %.3f" % z_offset)
         self._display_msg(f"DZOS: {z_offset:.3f}")
         
         self._set_z_offset(z_offset + self.probe_offset_z, home=True)
+        if self.drift_compensation and self.sensor_name != 'none' and self.static_bed_factor:
+            sensor_weights = [self.static_sensor_temperature_factor, self.static_sensor_temperature_factor2 if polynomial else 0.0]
+            self.drift.arm(sensor_weights, sensor_temperature)
+            gcmd.respond_info("DZOS: Drift Compensation Armed")
+
+
+    def _apply_drift_step(self, step: float):
+        gcmd_offset = self.gcode.create_gcode_command("SET_GCODE_OFFSET", "SET_GCODE_OFFSET", {'Z_ADJUST': step})
+        self.gcode_move.cmd_SET_GCODE_OFFSET(gcmd_offset)
+
+
+    def _is_printing(self, eventtime: float) -> bool:
+        return self.stats.get_status(eventtime)["state"] == "printing"
+
+
+    def _eddy_scan_z(self, gcmd, x: float, y: float):
+        sensor_helper = getattr(self.eddy_probe, "sensor_helper", None)
+        if not hasattr(sensor_helper, "add_client"):
+            gcmd.respond_info("DZOS: Eddy Scan Unavailable!")
+            return None
+        probe_offset_z = self.eddy_probe.probe_offsets.z_offset
+        scan_z = self.eddy_scan_z if self.eddy_scan_z is not None else probe_offset_z
+        radius = self.eddy_scan_radius
+        self._execute_hop_z(self.hop_z)
+        self.toolhead.manual_move([x - radius, y, None], self.speed)
+        self.toolhead.manual_move([None, None, scan_z], self.speed_z_hop)
+        self.toolhead.wait_moves()
+        scan_buffer = EddyScanBuffer()
+        sensor_helper.add_client(scan_buffer.handle_batch)
+        try:
+            start_time = self.toolhead.get_last_move_time()
+            for _ in range(self.eddy_scan_passes):
+                self.toolhead.manual_move([x + radius, y, None], self.eddy_scan_speed)
+                self.toolhead.manual_move([x, y - radius, None], self.eddy_scan_speed)
+                self.toolhead.manual_move([x, y + radius, None], self.eddy_scan_speed)
+                self.toolhead.manual_move([x - radius, y, None], self.eddy_scan_speed)
+            end_time = self.toolhead.get_last_move_time()
+            self.toolhead.wait_moves()
+            reactor = self.printer.get_reactor()
+            timeout = reactor.monotonic() + 2.0
+            while scan_buffer.last_time < end_time and reactor.monotonic() < timeout:
+                reactor.pause(reactor.monotonic() + 0.1)
+        finally:
+            scan_buffer.stop()
+        heights = scan_buffer.heights(start_time, end_time)
+        if len(heights) < 10:
+            gcmd.respond_info("DZOS: Eddy Scan Failed!")
+            return None
+        height, spread = ml_robust_mean(heights)
+        return {
+            "z": scan_z - height + probe_offset_z,
+            "spread": spread,
+            "samples": int(len(heights)),
+        }
 
-    def _calculate_mesh_bounds(self, gcmd):
-        exclude_objects = self.printer.lookup_object("exclude_object", None)
-        objects = exclude_objects.get_status().get("objects", [])
-        margin = 2.0
-        list_of_xs = []
-        list_of_ys = []
-        gcmd.respond_info("Found %s objects." % (len(objects)))
-        for obj in objects:
-            for point in obj["polygon"]:
-                list_of_xs.append(point[0])
-                list_of_ys.append(point[1])
-        print_min = [min(list_of_xs), min(list_of_ys)]
-        print_max = [max(list_of_xs), max(list_of_ys)]
-        margin_print_min = [x - margin for x in print_min]
-        margin_print_max = [x + margin for x in print_max]
-        print_max_center_size = max(abs(175 - margin_print_max[0]), abs(175 - margin_print_min[0]), abs(175 - margin_print_max[1]), abs(175 - margin_print_min[1]))
-        return print_max_center_size
+
+    def _fit_bed_surface(self, gcmd):
+        if self.bed_surface != "grid":
+            return None
+        points = self._probe_bed_grid(gcmd)
+        if points is None or len(points) < 3:
+            gcmd.respond_info("DZOS: Bed Surface Unavailable!")
+            return None
+        return ml_surface_fit(points, self.bed_center)
+
+
+    def _probe_bed_grid(self, gcmd):
+        offset = np.asarray(self.probe_offset_xy, dtype=float)
+        grid_x, grid_y = np.meshgrid(
+            np.linspace(self.print_geometry["min"][0], self.print_geometry["max"][0], self.bed_surface_grid),
+            np.linspace(self.print_geometry["min"][1], self.print_geometry["max"][1], self.bed_surface_grid),
+        )
+        bed_points = np.column_stack((grid_x.ravel(), grid_y.ravel()))
+        toolhead_points = np.clip(bed_points - offset, 0.0, 2.0 * np.asarray(self.bed_center, dtype=float))
+        spacing = np.max(bed_points.max(axis=0) - bed_points.min(axis=0)) / (self.bed_surface_grid - 1)
+        grid_z = np.array([
+            self._reuse_probe_z(float(x), float(y), radius=min(self.probe_reuse_radius, spacing / 2.0), interpolate=False)
+            for x, y in toolhead_points
+        ], dtype=float)
+        missing = np.isnan(grid_z)
+        self.reused_probe_count += int((~missing).sum())
+        if missing.any():
+            grid_z[missing] = self._probe_points(gcmd, "probe", toolhead_points[missing].tolist())
+        points = [[self.bed_xy[0] + offset[0], self.bed_xy[1] + offset[1], 0.0]]
+        points += np.column_stack((toolhead_points + offset, grid_z)).tolist()
+        return np.asarray(points, dtype=float)
+
+
+    def _calculate_print_geometry(self, gcmd) -> dict:
+        file_path = self._get_active_gcode_file()
+        cache_key = gcode_file_key(file_path)
+        if cache_key and cache_key in self.geometry_cache:
+            geometry = self.geometry_cache[cache_key]
+        else:
+            polygons = []
+            exclude_objects = self.printer.lookup_object("exclude_object", None)
+            if exclude_objects is not None:
+                objects = exclude_objects.get_status().get("objects", [])
+                polygons = [np.asarray(obj["polygon"], dtype=float) for obj in objects if obj.get("polygon")]
+            if not polygons and file_path:
+                polygons = read_gcode_object_polygons(file_path)
+            geometry = geometry_features(polygons, self.bed_center, margin=2.0)
+            if cache_key and geometry["objects"]:
+                self.geometry_cache = {cache_key: geometry}
+        gcmd.respond_info("Found %s objects." % geometry["objects"])
+        return geometry
 
     def _heat_soak(self, gcmd, current_bed_temperature: float, bed_temperature: int, force_soak_time: int=0):
         if force_soak_time > 0:
             duration = force_soak_time
         else:
-            print_max_center_size = self._calculate_mesh_bounds(gcmd)
+            print_max_center_size = self.print_geometry["max_center_size"]
             gcmd.respond_info("DZOS: Center Offset: %.3fmm" % print_max_center_size)
             soak_factor = self._calculate_soak_factor(current_bed_temperature, bed_temperature) * self.soak_multiplier
             gcmd.respond_info("DZOS: Soak Factor: %.3f" % soak_factor)
             duration =  int(max(((print_max_center_size / 0.085) - 300) * soak_factor, 120))
-        iteration = -1
-        nozzle_heater_enabled = False
-        if bed_temperature:
-            self._set_temperature(bed_temperature, blocking=True)
-        self._quad_gantry_level(check=True)
-        if not force_soak_time:
-            self.toolhead.manual_move([self.soak_xyz[0], self.soak_xyz[1], None], self.speed)
-            self.toolhead.manual_move([None, None, self.soak_xyz[2]], self.speed_z_hop)
         gcmd.respond_info("DZOS: Soak Time: %is" % duration)
-        while iteration < duration:
-            remaining = duration - iteration
-            self._display_msg(f"DZOS: {int(remaining)}")
-            if not nozzle_heater_enabled and remaining <= 120:
-                self._set_temperature(120, blocking=False, bed=False)
-                nozzle_heater_enabled = True
-            self.toolhead.dwell(1)
-            iteration += 1
+        scheduler = PrintStartScheduler(self.printer, abort_check=self._soak_aborted)
+        bed_task = None
+        if bed_temperature:
+            bed_task = self._schedule_bed_heat(scheduler, "bed_heat", bed_temperature, settle=True)
+        self._schedule_print_start(scheduler, duration, bed_task, travel=not force_soak_time)
+        self._run_print_start(gcmd, scheduler)
         return duration
 
 
@@ -398,29 +1035,124 @@ class DZOS:
             duration = force_soak_time
         else:
             duration =  120 * self.soak_multiplier
-        iteration = -1
-        nozzle_heater_enabled = False
+        gcmd.respond_info("DZOS: Soak Time: %is" % duration)
+        scheduler = PrintStartScheduler(self.printer, abort_check=self._soak_aborted)
+        overshoot_task = None
+        settle_task = None
         if bed_temperature:
             max_temperature = self.config.getsection("heater_bed").getint("max_temp", default=105)
             soak_temperature = min(bed_temperature + 15, max_temperature)
-            self._set_temperature(soak_temperature, blocking=True)
-            self._set_temperature(bed_temperature, blocking=True)
-        self._quad_gantry_level(check=True)
-        if not force_soak_time:
-            self.toolhead.manual_move([self.soak_xyz[0], self.soak_xyz[1], None], self.speed)
-            self.toolhead.manual_move([None, None, self.soak_xyz[2]], self.speed_z_hop)
-        gcmd.respond_info("DZOS: Soak Time: %is" % duration)
-        while iteration < duration:
-            remaining = duration - iteration
-            self._display_msg(f"DZOS: {int(remaining)}")
-            if not nozzle_heater_enabled and remaining <= 120:
-                self._set_temperature(120, blocking=False, bed=False) 
-                nozzle_heater_enabled = True
-            self.toolhead.dwell(1)
-            iteration += 1
+            overshoot_task = self._schedule_bed_heat(scheduler, "bed_overshoot", soak_temperature, settle=False)
+            settle_task = self._schedule_bed_heat(scheduler, "bed_settle", bed_temperature, settle=True, requires=[overshoot_task])
+        self._schedule_print_start(scheduler, duration, overshoot_task, settle_task, travel=not force_soak_time)
+        self._run_print_start(gcmd, scheduler)
         return duration
 
 
+    def _schedule_bed_heat(self, scheduler, name: str, temperature: int, settle: bool, requires: list=None) -> str:
+        heater = self.heaters.lookup_heater("heater_bed")
+        if settle:
+            done = lambda eventtime: not heater.check_busy(eventtime)
+        else:
+            done = lambda eventtime: heater.get_temp(eventtime)[0] >= temperature - 1.0
+        scheduler.add_task(
+            name,
+            requires=requires,
+            resource="heater_bed",
+            start=lambda: self._set_temperature(temperature, blocking=False),
+            done=done,
+        )
+        return name
+
+
+    def _schedule_print_start(self, scheduler, duration: float, hot_task: str, settle_task: str=None, travel: bool=True):
+        extruder_heater = self.heaters.lookup_heater("extruder")
+        scheduler.add_task(
+            "nozzle_preheat",
+            resource="extruder",
+            start=lambda: self._set_temperature(120, blocking=False, bed=False),
+            done=lambda eventtime: extruder_heater.get_temp(eventtime)[0] >= 118.0,
+        )
+        toolhead_task = None
+        if not self._quad_gantry_level_applied():
+            toolhead_task = scheduler.add_task(
+                "qgl",
+                requires=[hot_task],
+                resource="toolhead",
+                start=lambda: self._quad_gantry_level(check=True),
+                done=self._toolhead_idle,
+            )
+        if travel:
+            toolhead_task = scheduler.add_task(
+                "travel_soak",
+                requires=[toolhead_task],
+                resource="toolhead",
+                start=self._move_soak_position,
+                done=self._toolhead_idle,
+            )
+        def start_soak():
+            self._display_msg("DZOS: Soak")
+            self.soak_engine.start(duration, notify=scheduler.notify)
+        scheduler.add_task(
+            "soak",
+            requires=[toolhead_task, settle_task or hot_task],
+            start=start_soak,
+            done=lambda eventtime: not self.soak_engine.is_active(),
+            wake=lambda eventtime: self.soak_engine.reactor.NEVER,
+        )
+
+
+    def _run_print_start(self, gcmd, scheduler):
+        self.soak_engine.reset()
+        try:
+            timeline = scheduler.run()
+        finally:
+            self.soak_engine.stop()
+        self.probe_fresh_since = self.printer.get_reactor().monotonic()
+        self.print_start_timeline = timeline
+        gcmd.respond_info("DZOS: Start Time: %.1fs" % timeline["total"])
+        for entry in timeline["critical_path"]:
+            gcmd.respond_info("DZOS: Critical %s %.1fs -> %.1fs" % (entry["name"], entry["start"], entry["end"]))
+
+
+    def _soak_aborted(self) -> bool:
+        return self.soak_engine.state == "aborted"
+
+
+    def _toolhead_idle(self, eventtime: float) -> bool:
+        print_time, est_print_time, lookahead_empty = self.toolhead.check_busy(eventtime)
+        return lookahead_empty and est_print_time >= print_time
+
+
+    def _move_soak_position(self):
+        self.toolhead.manual_move([self.soak_xyz[0], self.soak_xyz[1], None], self.speed)
+        self.toolhead.manual_move([None, None, self.soak_xyz[2]], self.speed_z_hop)
+
+
+    def _read_sensor_temperature(self, eventtime: float) -> float:
+        if self.eddy:
+            sensor_status = self.printer.lookup_object(f'temperature_probe {self.sensor_name}').get_status(eventtime)
+            return sensor_status.get('temperature')
+        elif self.sensor_name != 'none':
+            sensor_status = self.printer.lookup_object(f'temperature_sensor {self.sensor_name}').get_status(eventtime)
+            return sensor_status.get('temperature')
+        return 0.0
+
+
+    def _read_telemetry_row(self, eventtime: float) -> list:
+        bed_status = self.heaters.lookup_heater("heater_bed").get_status(eventtime)
+        nozzle_status = self.heaters.lookup_heater("extruder").get_status(eventtime)
+        return [
+            bed_status["temperature"],
+            bed_status["target"],
+            bed_status["power"],
+            nozzle_status["temperature"],
+            nozzle_status["target"],
+            nozzle_status["power"],
+            self._read_sensor_temperature(eventtime),
+        ]
+
+
     def _display_msg(self, msg: str):
         gcmd = self.gcode.create_gcode_command(f"M117 {msg}", f"M117 {msg}", {})
         self.display_status_object.cmd_M117(gcmd)
@@ -431,15 +1163,18 @@ class DZOS:
             nozzle_temperature: int,            
             bed_temperature: int, 
             bed_type: str,
-            sensor_temperature: float
+            sensor_temperature: float,
+            filament_type: str=None,
+            nozzle_type: str=None,
+            bed_local: float=0.0,
         ) -> float:
         self._init_static_data() 
         if self.static_bed_factor:
-            bed_type_key = self.bed_type_dict[bed_type.lower()]
-            bed_type_factor = self.static_bed_type_factors[bed_type_key]
+            bed_type_factor = self._category_factor(bed_type, filament_type, nozzle_type)
             target_z_offset = (
                 (self.static_nozzle_factor * -self.static_e_pressure_nozzle) +
                 (self.static_bed_factor * d_bed_z) + 
+                (self.static_bed_local_factor * bed_local) +
                 (self.static_bed_temperature_factor * bed_temperature) +
                 bed_type_factor + 
                 (self.static_nozzle_temperature_factor * nozzle_temperature) +
@@ -458,15 +1193,18 @@ class DZOS:
             bed_temperature: int, 
             bed_type: str,
             sensor_temperature: float,
+            filament_type: str=None,
+            nozzle_type: str=None,
+            bed_local: float=0.0,
         ) -> float:
         self._init_static_data()        
         if self.static_bed_factor:
-            bed_type_key = self.bed_type_dict[bed_type.lower()]
-            bed_type_factor = self.static_bed_type_factors[bed_type_key]
+            bed_type_factor = self._category_factor(bed_type, filament_type, nozzle_type)
             target_z_offset = (
                 (self.static_nozzle_factor * -self.static_e_pressure_nozzle) +
                 (self.static_nozzle_temperature_factor * nozzle_temperature) +
                 (self.static_bed_factor * d_bed_z + self.static_bed_factor2 * (d_bed_z **2)) +
+                (self.static_bed_local_factor * bed_local) +
                 (self.static_bed_temperature_factor * bed_temperature + self.static_bed_temperature_factor2 * (bed_temperature **2)) +
                 bed_type_factor +
                 (self.static_sensor_temperature_factor * sensor_temperature + self.static_sensor_temperature_factor2 * (sensor_temperature **2)) +
@@ -478,29 +1216,27 @@ class DZOS:
         return target_z_offset                            
                            
 
-    def _generic_z_probe(self, gcmd, probe_object, x: float, y: float, hop=True) -> float:
-        try:
-            return self._latest_z_probe(gcmd, probe_object, x, y, hop)
-        except:
-            return self._stock_z_probe(gcmd, probe_object, x, y, hop)
-
-
-    def _stock_z_probe(self, gcmd, probe_object, x: float, y: float, hop=True) -> float:
-        if hop:
-            self._execute_hop_z(self.hop_z)
-            self.toolhead.manual_move([x, y, None], self.speed)
-        probe_z = probe_object.run_probe(gcmd)[2]
-        return probe_z
+    def _category_factor(self, bed_type: str, filament_type: str, nozzle_type: str) -> float:
+        return (
+            category_factor(self.static_bed_type_factors, bed_type, self.bed_type_dict) +
+            category_factor(self.static_filament_type_factors, filament_type) +
+            category_factor(self.static_nozzle_type_factors, nozzle_type)
+        )
 
 
-    def _latest_z_probe(self, gcmd, probe_object, x: float, y: float, hop=True) -> float:
-        if hop:
-            self._execute_hop_z(self.hop_z)
-            self.toolhead.manual_move([x, y, None], self.speed)
-        probe_session = probe_object.start_probe_session(gcmd)
-        probe_session.run_probe(gcmd)
-        probe_z = probe_session.pull_probed_results()[0][2]
-        probe_session.end_probe_session()
+    def _probe_points(self, gcmd, name: str, points: list, hop=True) -> np.ndarray:
+        backend = self.probe_backends.get(name)
+        if backend is None:
+            object_name = "probe_pressure" if name == "probe_pressure" else "probe"
+            backend = self.probe_backends[name] = ProbeBackend(self.printer, name, self.printer.lookup_object(object_name))
+        with backend.session(gcmd) as session:
+            for x, y in points:
+                if hop:
+                    self._execute_hop_z(self.hop_z)
+                    self.toolhead.manual_move([x, y, None], self.speed)
+                session.probe()
+            probe_z = session.results()
+        self.probe_latencies += session.latencies
         return probe_z
 
 
@@ -508,6 +1244,7 @@ class DZOS:
         current = list(self.toolhead.get_position())
         current[2] = current[2] - z
         self.toolhead.set_position(current)
+        self.probe_samples.shift_z(z)
 
 
     def _execute_hop_z(self, z: float):
@@ -552,6 +1289,9 @@ class DZOS:
             "bed_temperature": bed_temperature,
             "sensor_temperature": sensor_temperature,
             "bed_type": bed_type,
+            "print_area": self.print_geometry["area"],
+            "print_centroid": self.print_geometry["centroid"],
+            "print_radius": self.print_geometry["max_radius"],
         }
         return data_dict
 
@@ -588,11 +1328,15 @@ class DZOS:
     def _quad_gantry_level(self, check=False):
         gcmd_qgl = self.gcode.create_gcode_command("QUAD_GANTRY_LEVEL", "QUAD_GANTRY_LEVEL", {})
         qgl = self.printer.lookup_object('quad_gantry_level')
-        qgl_status = qgl.get_status(self.printer.get_reactor().monotonic()).get("applied", False)
-        if not check or (check and not qgl_status):
+        if not check or (check and not self._quad_gantry_level_applied()):
             qgl.cmd_QUAD_GANTRY_LEVEL(gcmd_qgl)
 
 
+    def _quad_gantry_level_applied(self) -> bool:
+        qgl = self.printer.lookup_object('quad_gantry_level')
+        return qgl.get_status(self.printer.get_reactor().monotonic()).get("applied", False)
+
+
     def _home_z(self):
         self.gcode.run_script_from_command("G28 Z")
         
@@ -624,6 +1368,9 @@ class DZOS:
                 time.sleep(5)
         if state.lower() == "complete":
             self.cmd_DZOS_Z_CAPTURE(gcmd)
+        self.telemetry.stop()
+        self.drift.disarm()
+        self._restore_profile()
         self._print_thread.join()
 
 
@@ -643,6 +1390,17 @@ class DZOS:
         }
 
 
+    def _read_gcode_materials(self) -> dict:
+        settings = get_gcode_settings(self._get_active_gcode_file(), ["filament_type", "nozzle_type", "nozzle_diameter"])
+        nozzle_type = self.nozzle_type
+        if nozzle_type == 'none' and "nozzle_diameter" in settings:
+            nozzle_type = " ".join(settings[key] for key in ("nozzle_type", "nozzle_diameter") if key in settings)
+        return {
+            "filament_type": settings.get("filament_type", "none"),
+            "nozzle_type": nozzle_type,
+        }
+
+
     def _get_active_gcode_file(self) -> str:
         virtual_sd = self.printer.lookup_object('virtual_sdcard')
         virtual_sd_stats = virtual_sd.get_status(self.printer.get_reactor().monotonic())
@@ -654,58 +1412,927 @@ def load_config(config):
     return DZOS(config)
 
 
+######################################################################################################################################################################################################
+# PROFILES
+######################################################################################################################################################################################################
+
+
+def profile_name(name: str) -> str:
+    name = str(name).strip().strip("'\"").lower()
+    name = "".join(character if character.isalnum() or character in "._-" else "_" for character in name).strip("._")
+    return name or "default"
+
+
+class ProfileStore:
+    """Training set and model files per named profile; the default profile keeps the original file locations."""
+    def __init__(self, root: str, default_static_filepath: str, default_print_data_filepath: str):
+        self.root = root
+        self.default_paths = (default_static_filepath, default_print_data_filepath)
+
+
+    def paths(self, name: str) -> tuple:
+        if name == "default":
+            return self.default_paths
+        profile_path = os.path.join(self.root, name)
+        return (
+            os.path.join(profile_path, os.path.basename(self.default_paths[0])),
+            os.path.join(profile_path, os.path.basename(self.default_paths[1])),
+        )
+
+
+    def create(self, name: str) -> tuple:
+        paths = self.paths(name)
+        try:
+            os.makedirs(os.path.dirname(paths[0]), exist_ok=True)
+        except OSError:
+            logging.exception(f"DZOS: Error Creating Profile {name}")
+        return paths
+
+
+    def names(self) -> list:
+        names = ["default"]
+        try:
+            names += sorted(entry for entry in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, entry)))
+        except OSError:
+            pass
+        return names
+
+
+    def directories(self) -> list:
+        return [self.root] + [os.path.dirname(self.paths(name)[0]) for name in self.names()]
+
+
+    def pooled_print_data(self, exclude: str=None) -> list:
+        pooled_data = []
+        for name in self.names():
+            if name == exclude:
+                continue
+            pooled_data += read_data(self.paths(name)[1]) or []
+        return pooled_data
+
+
+######################################################################################################################################################################################################
+# CATEGORIES
+######################################################################################################################################################################################################
+
+
+class CategoryRegistry:
+    """Persisted category levels for plates, filaments and nozzles; level order fixes the fit encoding."""
+    def __init__(self, file_path: str, defaults: dict):
+        self.file_path = file_path
+        self.categories = {kind: ["none"] for kind in CATEGORY_KINDS}
+        for kind, names in defaults.items():
+            for name in names:
+                category_index(self.categories, kind, name)
+        for kind, names in (read_data(file_path) or {}).items():
+            for name in names:
+                category_index(self.categories, kind, name)
+
+
+    def levels(self) -> dict:
+        return self.categories
+
+
+    def observe(self, kind: str, name) -> str:
+        name = category_name(name)
+        if name not in self.categories[kind]:
+            self.categories[kind].append(name)
+            write_data(self.file_path, self.categories)
+        return name
+
+
+    def observe_data(self, print_data: list):
+        count = sum(len(names) for names in self.categories.values())
+        for entry in print_data:
+            for kind in CATEGORY_KINDS:
+                category_index(self.categories, kind, entry.get(kind))
+        if sum(len(names) for names in self.categories.values()) != count:
+            write_data(self.file_path, self.categories)
+
+
+######################################################################################################################################################################################################
+# PROBE BACKEND
+######################################################################################################################################################################################################
+
+
+class ProbeBackend:
+    """One probe object with its API detected once: mainline probe sessions or the stock run_probe call."""
+    def __init__(self, printer, name: str, probe_object, capacity: int=256):
+        self.reactor = printer.get_reactor()
+        self.name = name
+        self.probe_object = probe_object
+        self.session_api = callable(getattr(probe_object, "start_probe_session", None))
+        self.capacity = capacity
+        self.latencies = np.empty(0, dtype=float)
+        self.probes = 0
+
+
+    def session(self, gcmd):
+        return ProbeSession(self, gcmd)
+
+
+    def record(self, latencies: list):
+        self.latencies = np.concatenate((self.latencies, latencies))[-self.capacity:]
+        self.probes += len(latencies)
+
+
+    def get_status(self, eventtime: float) -> dict:
+        return {
+            "api": "session" if self.session_api else "stock",
+            "probes": self.probes,
+            "latency": float(self.latencies.mean()) if len(self.latencies) else 0.0,
+        }
+
+
+class ProbeSession:
+    """All probes of one operation; results are pulled once when the session closes."""
+    def __init__(self, backend: ProbeBackend, gcmd):
+        self.backend = backend
+        self.gcmd = gcmd
+        self.session = None
+        self.positions = []
+        self.latencies = []
+
+
+    def __enter__(self):
+        if self.backend.session_api:
+            self.session = self.backend.probe_object.start_probe_session(self.gcmd)
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.session is not None:
+            self.session.end_probe_session()
+            self.session = None
+        self.backend.record(self.latencies)
+        return False
+
+
+    def probe(self):
+        start_time = self.backend.reactor.monotonic()
+        if self.session is not None:
+            self.session.run_probe(self.gcmd)
+        else:
+            self.positions.append(self.backend.probe_object.run_probe(self.gcmd))
+        self.latencies.append(self.backend.reactor.monotonic() - start_time)
+
+
+    def results(self) -> np.ndarray:
+        if self.session is not None:
+            self.positions = self.session.pull_probed_results()
+        return np.array([position[2] for position in self.positions], dtype=float)
+
+
+######################################################################################################################################################################################################
+# PROBE SAMPLES
+######################################################################################################################################################################################################
+
+
+def probe_position_xyz(position) -> list:
+    # mainline ProbeResult leads with bed coordinates; the toolhead position is test_x/test_y and bed_z matches ProbeSession.results
+    if hasattr(position, "test_x"):
+        return [position.test_x, position.test_y, position.bed_z]
+    return [position[0], position[1], position[2]]
+
+
+class ProbeSampleStore:
+    """Probe results recorded from other Klipper modules in toolhead coordinates of the current Z frame."""
+    def __init__(self, capacity: int=1024):
+        self.capacity = capacity
+        self.points = np.empty((0, 3), dtype=float)
+        self.times = np.empty(0, dtype=float)
+        self.sources = np.empty(0, dtype=object)
+
+
+    def add(self, positions: list, source: str, eventtime: float):
+        self.discard(source)
+        points = np.asarray([probe_position_xyz(position) for position in positions], dtype=float).reshape(-1, 3)
+        self.points = np.concatenate((self.points, points))[-self.capacity:]
+        self.times = np.concatenate((self.times, np.full(len(points), eventtime)))[-self.capacity:]
+        self.sources = np.concatenate((self.sources, np.full(len(points), source, dtype=object)))[-self.capacity:]
+
+
+    def discard(self, source: str):
+        keep = self.sources != source
+        self.points, self.times, self.sources = self.points[keep], self.times[keep], self.sources[keep]
+
+
+    def clear(self):
+        self.__init__(self.capacity)
+
+
+    def shift_z(self, z: float):
+        self.points[:, 2] -= z
+
+
+    def fresh(self, min_time: float, source: str=None) -> np.ndarray:
+        mask = self.times >= min_time
+        if source:
+            mask &= self.sources == source
+        return self.points[mask]
+
+
+    def estimate(self, x: float, y: float, radius: float, min_time: float, bed_center: list, interpolate: bool=True):
+        points = self.fresh(min_time)
+        if not len(points):
+            return None
+        distances = np.hypot(points[:, 0] - x, points[:, 1] - y)
+        nearby = distances <= radius
+        if nearby.any():
+            return float(np.mean(points[nearby, 2]))
+        if interpolate and len(points) >= 3 and x >= points[:, 0].min() and x <= points[:, 0].max() and y >= points[:, 1].min() and y <= points[:, 1].max():
+            return float(ml_surface_evaluate(ml_surface_fit(points, bed_center), x, y, bed_center))
+        return None
+
+
+######################################################################################################################################################################################################
+# EDDY SCAN
+######################################################################################################################################################################################################
+
+
+class EddyScanBuffer:
+    """Collects (time, frequency, z) batches streamed by an eddy current sensor helper."""
+    def __init__(self):
+        self.chunks = []
+        self.last_time = 0.0
+        self.active = True
+
+
+    def handle_batch(self, msg) -> bool:
+        if not self.active:
+            return False
+        data = np.asarray(msg.get("data", []), dtype=float)
+        if data.ndim == 2 and len(data):
+            self.chunks.append(data[:, [0, 2]])
+            self.last_time = float(data[-1, 0])
+        return True
+
+
+    def stop(self):
+        self.active = False
+
+
+    def heights(self, start_time: float, end_time: float) -> np.ndarray:
+        if not self.chunks:
+            return np.empty(0, dtype=float)
+        samples = np.concatenate(self.chunks)
+        mask = (samples[:, 0] >= start_time) & (samples[:, 0] <= end_time) & np.isfinite(samples[:, 1])
+        return samples[mask, 1]
+
+
+######################################################################################################################################################################################################
+# TELEMETRY
+######################################################################################################################################################################################################
+
+
+class ThermalTelemetry:
+    """Ring buffer of heater and sensor readings sampled by a reactor timer.
+    Once downsampled, the rows recorded so far are kept and only the rest of the buffer is overwritten."""
+    COLUMNS = ["time", "bed_temperature", "bed_target", "bed_power", "nozzle_temperature", "nozzle_target", "nozzle_power", "sensor_temperature"]
+
+    def __init__(self, printer, read_row, interval: float=1.0, capacity: int=14400):
+        self.reactor = printer.get_reactor()
+        self.read_row = read_row
+        self.base_interval = interval
+        self.interval = interval
+        self.buffer = np.zeros((capacity, len(self.COLUMNS)), dtype=np.float32)
+        self.count = 0
+        self.kept = 0
+        self.start_time = 0.0
+        self.active = False
+        self.timer = self.reactor.register_timer(self._handle_timer, self.reactor.NEVER)
+
+
+    def start(self):
+        self.count = 0
+        self.kept = 0
+        self.interval = self.base_interval
+        self.start_time = self.reactor.monotonic()
+        self.active = True
+        self.reactor.update_timer(self.timer, self.reactor.NOW)
+
+
+    def stop(self):
+        self.active = False
+
+
+    def downsample(self, interval: float):
+        samples = self.samples()
+        self.buffer[:len(samples)] = samples
+        self.count = self.kept = len(samples)
+        self.interval = max(interval, self.base_interval)
+
+
+    def _handle_timer(self, eventtime: float) -> float:
+        if not self.active:
+            return self.reactor.NEVER
+        try:
+            row = self.read_row(eventtime)
+        except Exception:
+            return eventtime + self.interval
+        ring = len(self.buffer) - self.kept
+        if ring <= 0:
+            return self.reactor.NEVER
+        self.buffer[self.kept + (self.count - self.kept) % ring] = [eventtime - self.start_time] + [value if value is not None else np.nan for value in row]
+        self.count += 1
+        return eventtime + self.interval
+
+
+    def samples(self) -> np.ndarray:
+        capacity = len(self.buffer)
+        if self.count <= capacity:
+            return self.buffer[:self.count].copy()
+        ring = self.buffer[self.kept:]
+        return np.concatenate((self.buffer[:self.kept], np.roll(ring, -((self.count - self.kept) % len(ring)), axis=0)))
+
+
+    def summary(self) -> dict:
+        samples = self.samples().astype(float)
+        if len(samples) < 2:
+            return {"samples": int(len(samples))}
+        elapsed = samples[:, 0]
+        dt = np.diff(elapsed, append=elapsed[-1] + self.interval)
+        summary = {"samples": int(len(samples)), "duration": float(elapsed[-1] - elapsed[0])}
+        for name, column in (("bed", 1), ("nozzle", 4), ("sensor", 7)):
+            values = samples[:, column]
+            valid = np.isfinite(values)
+            if valid.sum() < 2:
+                continue
+            summary[f"{name}_mean"] = float(np.mean(values[valid]))
+            summary[f"{name}_slope"] = float(np.polyfit(elapsed[valid], values[valid], 1)[0] * 60.0)
+        for name, column in (("bed", 1), ("nozzle", 4)):
+            target = samples[:, column + 1]
+            summary[f"{name}_time_above_target"] = float(np.sum(dt[(target > 0) & (samples[:, column] >= target - 1.0)]))
+            summary[f"{name}_power_mean"] = float(np.mean(samples[:, column + 2]))
+        return summary
+
+
+    def save(self, file_path: str) -> bool:
+        try:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            payload = io.BytesIO()
+            np.save(payload, self.samples())
+            atomic_write(file_path, payload.getvalue())
+            return True
+        except OSError:
+            logging.exception(f"DZOS: Error Telemetry Write")
+            return False
+
+
+######################################################################################################################################################################################################
+# DRIFT COMPENSATION
+######################################################################################################################################################################################################
+
+
+class DriftCompensator:
+    """Re-evaluates the sensor temperature terms of the model during a print and applies rate limited Z adjustments."""
+    def __init__(self, printer, read_temperature, apply_step, is_printing, interval: float, band: float, rate: float, min_step: float):
+        self.reactor = printer.get_reactor()
+        self.read_temperature = read_temperature
+        self.apply_step = apply_step
+        self.is_printing = is_printing
+        self.interval = interval
+        self.band = band
+        self.rate = rate
+        self.min_step = min_step
+        self.weights = np.zeros(2, dtype=float)
+        self.basis = np.zeros(2, dtype=float)
+        self.applied = 0.0
+        self.log = []
+        self.active = False
+        self.start_time = 0.0
+        self.timer = self.reactor.register_timer(self._handle_timer, self.reactor.NEVER)
+
+
+    def arm(self, weights: list, temperature: float):
+        self.weights = np.asarray(weights, dtype=float)
+        self.basis = np.array([temperature, temperature ** 2], dtype=float)
+        self.applied = 0.0
+        self.log = []
+        self.active = True
+        self.start_time = self.reactor.monotonic()
+        self.reactor.update_timer(self.timer, self.start_time + self.interval)
+
+
+    def disarm(self) -> tuple:
+        self.active = False
+        log, applied = self.log, self.applied
+        self.log = []
+        self.applied = 0.0
+        return log, applied
+
+
+    def get_status(self, eventtime: float) -> dict:
+        return {
+            "active": self.active,
+            "applied": self.applied,
+            "adjustments": len(self.log),
+        }
+
+
+    def _handle_timer(self, eventtime: float) -> float:
+        if not self.active:
+            return self.reactor.NEVER
+        try:
+            temperature = self.read_temperature(eventtime)
+            if temperature is None or not self.is_printing(eventtime):
+                return eventtime + self.interval
+        except Exception:
+            return eventtime + self.interval
+        target = -float(self.weights.dot(np.array([temperature, temperature ** 2]) - self.basis))
+        target = min(max(target, -self.band), self.band)
+        step = min(max(target - self.applied, -self.rate), self.rate)
+        if abs(step) >= self.min_step:
+            self.apply_step(step)
+            self.applied += step
+            self.log.append([round(eventtime - self.start_time, 1), round(temperature, 2), round(step, 4), round(self.applied, 4)])
+        return eventtime + self.interval
+
+
+######################################################################################################################################################################################################
+# SOAK ENGINE
+######################################################################################################################################################################################################
+
+
+class SoakEngine:
+    """Soak countdown driven by a single reactor timer. Remaining time is computed on demand from the end time.
+    A print pause holds the countdown until the print resumes; only a cancel or shutdown aborts the soak."""
+    def __init__(self, printer, print_state=None, check_interval: float=5.0):
+        self.reactor = printer.get_reactor()
+        self.print_state = print_state
+        self.check_interval = check_interval
+        self.print_paused = False
+        self.held = False
+        self.start_print_state = "printing"
+        self.state = "idle"
+        self.duration = 0.0
+        self.end_time = 0.0
+        self.paused_remaining = 0.0
+        self.notify = None
+        self.timer = self.reactor.register_timer(self._handle_timer, self.reactor.NEVER)
+
+
+    def start(self, duration: float, notify=None):
+        self.duration = float(duration)
+        self.notify = notify
+        self.print_paused = False
+        self.held = False
+        self.start_print_state = self.print_state() if self.print_state else "printing"
+        self.state = "running"
+        self.end_time = self.reactor.monotonic() + self.duration
+        self.reactor.update_timer(self.timer, self._next_wake(self.reactor.monotonic()))
+
+
+    def is_active(self) -> bool:
+        return self.state in ("running", "paused")
+
+
+    def remaining(self, eventtime: float) -> float:
+        if self.state == "running":
+            return max(self.end_time - eventtime, 0.0)
+        if self.state == "paused":
+            return self.paused_remaining
+        return 0.0
+
+
+    def pause(self):
+        if self.state != "running":
+            raise ValueError("DZOS: No Running Soak")
+        self.paused_remaining = self.remaining(self.reactor.monotonic())
+        self.state = "paused"
+        self.reactor.update_timer(self.timer, self._next_wake(self.reactor.monotonic()))
+
+
+    def resume(self):
+        if self.state != "paused":
+            raise ValueError("DZOS: No Paused Soak")
+        self.held = False
+        self.state = "running"
+        self.end_time = self.reactor.monotonic() + self.paused_remaining
+        self.reactor.update_timer(self.timer, self._next_wake(self.reactor.monotonic()))
+
+
+    def extend(self, seconds: float):
+        if not self.is_active():
+            raise ValueError("DZOS: No Active Soak")
+        self.duration += seconds
+        if self.state == "paused":
+            self.paused_remaining = max(self.paused_remaining + seconds, 0.0)
+        else:
+            self.end_time += seconds
+            self.reactor.update_timer(self.timer, self._next_wake(self.reactor.monotonic()))
+
+
+    def skip(self):
+        if not self.is_active():
+            raise ValueError("DZOS: No Active Soak")
+        self._finish("skipped")
+
+
+    def stop(self):
+        if self.is_active():
+            self._finish("aborted")
+        self.notify = None
+
+
+    def reset(self):
+        if not self.is_active():
+            self.state = "idle"
+
+
+    def get_status(self, eventtime: float) -> dict:
+        return {
+            "state": self.state,
+            "duration": self.duration,
+            "remaining": self.remaining(eventtime),
+        }
+
+
+    def _finish(self, state: str):
+        self.state = state
+        self.reactor.update_timer(self.timer, self.reactor.NEVER)
+        if self.notify:
+            self.notify()
+
+
+    def _next_wake(self, eventtime: float) -> float:
+        if self.state == "running":
+            return min(self.end_time, eventtime + self.check_interval)
+        return eventtime + self.check_interval
+
+
+    def _handle_timer(self, eventtime: float) -> float:
+        if not self.is_active():
+            return self.reactor.NEVER
+        print_state = self.print_state() if self.print_state else "printing"
+        if print_state == "cancelled" and self.start_print_state != "cancelled":
+            self._finish("aborted")
+            return self.reactor.NEVER
+        print_paused = print_state == "paused"
+        if print_paused and not self.print_paused and self.state == "running":
+            self.pause()
+            self.held = True
+        elif not print_paused and self.held:
+            self.resume()
+        self.print_paused = print_paused
+        if self.state == "running" and eventtime >= self.end_time:
+            self._finish("done")
+            return self.reactor.NEVER
+        return self._next_wake(eventtime)
+
+
+######################################################################################################################################################################################################
+# PRINT START SCHEDULER
+######################################################################################################################################################################################################
+
+
+class PrintStartTask:
+    def __init__(self, name: str, requires: list, resource: str, start, done, wake):
+        self.name = name
+        self.requires = [task for task in (requires or []) if task]
+        self.resource = resource
+        self.start = start
+        self.done = done
+        self.wake = wake
+        self.start_time = None
+        self.end_time = None
+
+
+class PrintStartScheduler:
+    """Runs print start tasks as soon as their prerequisites are finished and their resource is free."""
+    def __init__(self, printer, abort_check=None, poll_interval: float=1.0):
+        self.printer = printer
+        self.reactor = printer.get_reactor()
+        self.abort_check = abort_check
+        self.poll_interval = poll_interval
+        self.tasks: dict[str, PrintStartTask] = {}
+        self.origin = None
+        self.wake_completion = None
+
+
+    def add_task(self, name: str, requires: list=None, resource: str=None, start=None, done=None, wake=None) -> str:
+        self.tasks[name] = PrintStartTask(name, requires, resource, start, done, wake)
+        return name
+
+
+    def notify(self):
+        if self.wake_completion is not None:
+            self.wake_completion.complete(True)
+
+
+    def run(self) -> dict:
+        self.origin = self.reactor.monotonic()
+        pending = list(self.tasks.values())
+        running: list[PrintStartTask] = []
+        busy_resources = set()
+        while pending or running:
+            if self.printer.is_shutdown():
+                raise self.printer.command_error("DZOS: Print Start Aborted")
+            if self.abort_check and self.abort_check():
+                break
+            eventtime = self.reactor.monotonic()
+            for task in list(running):
+                if task.done(eventtime):
+                    task.end_time = eventtime
+                    running.remove(task)
+                    busy_resources.discard(task.resource)
+            for task in list(pending):
+                if task.resource in busy_resources:
+                    continue
+                if any(self.tasks[name].end_time is None for name in task.requires):
+                    continue
+                pending.remove(task)
+                task.start_time = self.reactor.monotonic()
+                if task.start:
+                    task.start()
+                if task.done is None:
+                    task.end_time = self.reactor.monotonic()
+                else:
+                    running.append(task)
+                    if task.resource:
+                        busy_resources.add(task.resource)
+            if not running and pending and not any(self._is_ready(task, busy_resources) for task in pending):
+                raise self.printer.command_error("DZOS: Print Start Deadlock")
+            if running:
+                eventtime = self.reactor.monotonic()
+                waketime = min(task.wake(eventtime) if task.wake else eventtime + self.poll_interval for task in running)
+                self.wake_completion = self.reactor.completion()
+                self.wake_completion.wait(waketime)
+                self.wake_completion = None
+        return self.timeline()
+
+
+    def _is_ready(self, task: PrintStartTask, busy_resources: set) -> bool:
+        return task.resource not in busy_resources and all(self.tasks[name].end_time is not None for name in task.requires)
+
+
+    def timeline(self) -> dict:
+        tasks = [task for task in self.tasks.values() if task.end_time is not None]
+        if not tasks:
+            return {"total": 0.0, "tasks": [], "critical_path": []}
+        entries = {
+            task.name: {
+                "name": task.name,
+                "start": round(task.start_time - self.origin, 2),
+                "end": round(task.end_time - self.origin, 2),
+            } for task in tasks
+        }
+        critical_path = []
+        task = max(tasks, key=lambda task: task.end_time)
+        while task:
+            critical_path.insert(0, entries[task.name])
+            requires = [self.tasks[name] for name in task.requires]
+            task = max(requires, key=lambda task: task.end_time) if requires else None
+        return {
+            "total": round(max(task.end_time for task in tasks) - self.origin, 2),
+            "tasks": list(entries.values()),
+            "critical_path": critical_path,
+        }
+
+
 ######################################################################################################################################################################################################
 # UTILS
 ######################################################################################################################################################################################################
 
 
+WRITE_LOCK = threading.RLock()
+APPEND_COMPACT = 32
+DATA_FILENAMES = (
+    os.path.basename(STATIC_FILEPATH),
+    os.path.basename(PRINT_DATA_FILEPATH),
+    os.path.basename(CATEGORY_FILEPATH),
+    os.path.basename(BASE_MODEL_FILEPATH),
+    MODEL_HISTORY_FILENAME,
+    FLEET_DATA_FILENAME,
+)
+
+
+def checksum_path(file_path: str) -> str:
+    return f"{file_path}.sha256"
+
+
+def journal_path(file_path: str) -> str:
+    return f"{file_path}.journal"
+
+
+def append_path(file_path: str) -> str:
+    return f"{file_path}.append"
+
+
+def previous_path(file_path: str) -> str:
+    return f"{file_path}.prev"
+
+
+def sync_directory(file_path: str):
+    directory = os.open(os.path.dirname(file_path) or ".", os.O_RDONLY)
+    try:
+        os.fsync(directory)
+    finally:
+        os.close(directory)
+
+
+def atomic_write(file_path: str, payload: bytes, sync_dir: bool=True):
+    temp_path = f"{file_path}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(payload)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, file_path)
+    if sync_dir:
+        sync_directory(file_path)
+
+
+@contextlib.contextmanager
+def file_lock(file_path: str):
+    # WRITE_LOCK serializes threads, flock serializes klippy, the CLI and the fleet service; not reentrant per file
+    with WRITE_LOCK, open(f"{file_path}.lock", "a") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def commit_data(file_path: str, data):
+    # caller holds file_lock; once the journal is synced the write is committed and a replay finishes it
+    payload = json.dumps(data, indent=4).encode()
+    replay_journal(file_path)
+    with open(journal_path(file_path), "wb") as journal:
+        journal.write(payload)
+        journal.flush()
+        os.fsync(journal.fileno())
+    sync_directory(file_path)
+    publish_journal(file_path, payload)
+
+
+def publish_journal(file_path: str, payload: bytes):
+    # idempotent, so a replay can repeat any step an interrupted commit already made
+    atomic_write(checksum_path(file_path), hashlib.sha256(payload).hexdigest().encode(), sync_dir=False)
+    with contextlib.suppress(OSError):
+        os.remove(previous_path(file_path))
+    with contextlib.suppress(OSError):
+        # the previous version is what read_data falls back to; filesystems without hard links simply keep none
+        os.link(file_path, previous_path(file_path))
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(append_path(file_path))
+    os.replace(journal_path(file_path), file_path)
+    sync_directory(file_path)
+
+
 def write_data(file_path: str, data: dict):
     try:
-        with open(file_path, "w") as file:
-            json.dump(data, file, indent=4)
-    except:
-        print(f"DZOS: Error Data Write")
+        with file_lock(file_path):
+            commit_data(file_path, data)
+    except (OSError, TypeError, ValueError):
+        logging.exception(f"DZOS: Error Data Write {file_path}")
 
 
 def append_data(file_path: str, data: dict):
+    # one synced line per record; the history is only rewritten every APPEND_COMPACT records
+    try:
+        with file_lock(file_path):
+            replay_journal(file_path)
+            line = (json.dumps(data) + "\n").encode()
+            created = not os.path.exists(append_path(file_path))
+            with open(append_path(file_path), "a+b") as log:
+                log.seek(0)
+                content = log.read()
+                if not content.endswith(b"\n"):
+                    # drop the torn tail of an interrupted append
+                    log.truncate(content.rfind(b"\n") + 1)
+                log.write(line)
+                log.flush()
+                os.fsync(log.fileno())
+            if created:
+                sync_directory(file_path)
+            if content.count(b"\n") + 1 >= APPEND_COMPACT:
+                commit_data(file_path, load_data(file_path, locked=True))
+    except (OSError, TypeError, ValueError):
+        logging.exception(f"DZOS: Error Data Write {file_path}")
+
+
+def replay_journal(file_path: str) -> bool:
+    # caller holds file_lock; a complete journal is published again, a torn one never committed and is dropped
+    try:
+        with open(journal_path(file_path), "rb") as journal:
+            payload = journal.read()
+    except FileNotFoundError:
+        return False
+    try:
+        json.loads(payload)
+    except ValueError:
+        os.remove(journal_path(file_path))
+        logging.warning(f"DZOS: Dropped Incomplete Write {file_path}")
+        return True
+    publish_journal(file_path, payload)
+    return True
+
+
+def replay_journals(directories: list) -> int:
+    # only DZOS's own data files, nothing else in the config tree is touched
+    replayed = 0
+    for directory in directories:
+        for file_name in DATA_FILENAMES:
+            file_path = os.path.join(directory, file_name)
+            if not os.path.exists(journal_path(file_path)):
+                continue
+            try:
+                with file_lock(file_path):
+                    replayed += replay_journal(file_path)
+            except OSError:
+                logging.exception(f"DZOS: Error Journal Replay {file_path}")
+    return replayed
+
+
+def file_checksum(file_path: str) -> str:
+    try:
+        with open(file_path, "rb") as file:
+            return hashlib.sha256(file.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def read_checksum(file_path: str) -> str:
+    try:
+        with open(checksum_path(file_path), "r") as file:
+            return file.read().strip()
+    except OSError:
+        return None
+
+
+def read_appended(file_path: str) -> list:
     try:
-        if not os.path.exists(file_path):
-            write_data(file_path, [])
-        loaded_data: list = read_data(file_path)
-        loaded_data.append(data)
-        with open(file_path, "w") as file:
-            json.dump(loaded_data, file, indent=4)
-    except:
-        print(f"DZOS: Error Data Append")
+        with open(append_path(file_path), "rb") as log:
+            lines = log.read().split(b"\n")
+    except FileNotFoundError:
+        return []
+    # the last line is empty, or torn by an interrupted append
+    return [json.loads(line) for line in lines[:-1]]
+
+
+def write_gcode(file_path: str, lines: list):
+    try:
+        atomic_write(file_path, ("\n".join(lines) + "\n").encode())
+    except OSError:
+        logging.exception(f"DZOS: Error Gcode Write {file_path}")
+
+
+def load_data(file_path: str, locked: bool=False):
+    # None only when nothing was ever written; an unreadable file raises so callers never write over it
+    data = None
+    if os.path.exists(file_path):
+        with open(file_path, "rb") as file:
+            payload = file.read()
+        expected = read_checksum(file_path)
+        if expected and hashlib.sha256(payload).hexdigest() != expected and not locked:
+            # a writer may be between its checksum and its rename, check again once it is done
+            with file_lock(file_path):
+                replay_journal(file_path)
+                return load_data(file_path, locked=True)
+        if expected and hashlib.sha256(payload).hexdigest() != expected:
+            logging.warning(f"DZOS: Checksum Mismatch {file_path}, file was changed outside DZOS")
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            with open(previous_path(file_path), "rb") as file:
+                data = json.loads(file.read())
+            logging.warning(f"DZOS: Unreadable {file_path}, using the previous version")
+    appended = read_appended(file_path)
+    if appended:
+        data = (data or []) + appended
+    return data
 
 
 def read_data(file_path: str) -> dict:  
     try:
-        if os.path.exists(file_path):
-            with open(file_path, "r") as file:
-                data = json.load(file)
-            return data
-    except:
-        print(f"DZOS: Error Data Read")
+        return load_data(file_path)
+    except (OSError, ValueError):
+        logging.exception(f"DZOS: Error Data Read {file_path}")
 
 
 def delete_file(file_path):
     try:
-        if os.path.exists(file_path):
-            os.remove(file_path)
-    except:
-        print(f"DZOS: Error Deleting File")
+        for path in (file_path, checksum_path(file_path), append_path(file_path), previous_path(file_path)):
+            if os.path.exists(path):
+                os.remove(path)
+    except OSError:
+        logging.exception(f"DZOS: Error Deleting File {file_path}")
 
 
 def backup_file(file_path):
     try:
-        if os.path.exists(file_path):
-            base, ext = os.path.splitext(file_path)
-            backup_path = f"{base}_backup{ext}"
-            delete_file(backup_path)
-            os.rename(file_path, backup_path)
-    except:
-        print(f"DZOS: Error Backing Up File")
+        base, ext = os.path.splitext(file_path)
+        backup_path = f"{base}_backup{ext}"
+        for path, target in ((file_path, backup_path), (checksum_path(file_path), checksum_path(backup_path)), (append_path(file_path), append_path(backup_path))):
+            if os.path.exists(path):
+                os.replace(path, target)
+            elif os.path.exists(target):
+                os.remove(target)
+        for path in (previous_path(file_path), previous_path(backup_path)):
+            if os.path.exists(path):
+                os.remove(path)
+    except OSError:
+        logging.exception(f"DZOS: Error Backing Up File {file_path}")
 
 
 def get_gcode_command(file_path: str, command: str) -> list:
@@ -716,11 +2343,29 @@ def get_gcode_command(file_path: str, command: str) -> list:
                 line = line.strip()
                 if line.startswith(command):
                     command_list.append(line)
-    except:
-        print(f"DZOS: Error Reading Gcode File")
+    except (OSError, TypeError):
+        logging.exception(f"DZOS: Error Reading Gcode File")
     return command_list
 
 
+def get_gcode_settings(file_path: str, keys: list, tail_size: int=262144) -> dict:
+    settings = {}
+    try:
+        with open(file_path, "rb") as file:
+            file.seek(0, os.SEEK_END)
+            file.seek(max(0, file.tell() - tail_size))
+            for line in file.read().decode("utf-8", errors="ignore").splitlines():
+                if not line.startswith(";") or "=" not in line:
+                    continue
+                key, value = line[1:].split("=", 1)
+                key = key.strip()
+                if key in keys:
+                    settings[key] = value.strip().replace(",", ";").split(";")[0].strip().strip('"')
+    except (OSError, TypeError):
+        logging.exception(f"DZOS: Error Reading Gcode File")
+    return settings
+
+
 def get_command_temperature(command: str) -> int:
     parts = command.split()
     for part in parts:
@@ -730,10 +2375,307 @@ def get_command_temperature(command: str) -> int:
             return temperature
 
 
+######################################################################################################################################################################################################
+# CAMPAIGN
+######################################################################################################################################################################################################
+
+
+def campaign_pattern(file_path: str) -> dict:
+    defines = []
+    block = []
+    in_block = False
+    try:
+        with open(file_path, "r") as file:
+            for line in file:
+                line = line.rstrip("\n")
+                if line.startswith("EXCLUDE_OBJECT_DEFINE"):
+                    defines.append(line)
+                elif line.startswith("M117 DZOS: Print"):
+                    in_block = True
+                elif in_block and line.startswith("DZOS_Z_CAPTURE"):
+                    break
+                elif in_block:
+                    block.append(line)
+    except OSError:
+        logging.exception(f"DZOS: Error Reading Gcode File")
+        return None
+    nozzle_command_list = [line for line in block if line.startswith("M109")]
+    bed_command_list = [line for line in block if line.startswith("M190")]
+    if not block or not nozzle_command_list or not bed_command_list:
+        return None
+    return {
+        "defines": defines,
+        "block": block,
+        "nozzle_temperature": get_command_temperature(nozzle_command_list[0]),
+        "bed_temperature": get_command_temperature(bed_command_list[0]),
+    }
+
+
+def campaign_features(bed_temperatures, nozzle_temperatures, plate_indices, plate_count: int) -> np.ndarray:
+    bed = np.asarray(bed_temperatures, dtype=float) / 100.0
+    nozzle = np.asarray(nozzle_temperatures, dtype=float) / 250.0
+    plates = np.zeros((len(bed), plate_count), dtype=float)
+    plates[np.arange(len(bed)), np.asarray(plate_indices, dtype=int)] = 1.0
+    return np.column_stack((np.ones_like(bed), bed, bed ** 2, nozzle, plates))
+
+
+def campaign_heat_time(from_temperatures: tuple, bed_temperatures: np.ndarray, nozzle_temperatures: np.ndarray) -> np.ndarray:
+    bed_delta = bed_temperatures - from_temperatures[0]
+    nozzle_delta = nozzle_temperatures - from_temperatures[1]
+    bed_time = np.where(bed_delta > 0, bed_delta / 0.5, -bed_delta / 0.1)
+    nozzle_time = np.where(nozzle_delta > 0, nozzle_delta / 3.0, -nozzle_delta / 1.0)
+    return np.maximum(bed_time, nozzle_time)
+
+
+def campaign_plan(candidates: list, print_data: list, plate_names: list, current_temperatures: tuple, heat_scale: float=300.0) -> list:
+    plate_indices = {plate: index for index, plate in enumerate(plate_names)}
+    bed = np.array([candidate[1] for candidate in candidates], dtype=float)
+    nozzle = np.array([candidate[2] for candidate in candidates], dtype=float)
+    plate = np.array([plate_indices[category_name(candidate[0])] for candidate in candidates], dtype=int)
+    features = campaign_features(bed, nozzle, plate, len(plate_names))
+    entries = [entry for entry in print_data if entry.get("z_offset") is not None and category_name(entry.get("bed_type")) in plate_indices]
+    information = np.eye(features.shape[1]) * 1e-3
+    if entries:
+        existing = campaign_features(
+            [entry["bed_temperature"] for entry in entries],
+            [entry["nozzle_temperature"] for entry in entries],
+            [plate_indices[category_name(entry["bed_type"])] for entry in entries],
+            len(plate_names),
+        )
+        information += existing.T.dot(existing)
+    information_inverse = np.linalg.inv(information)
+    order = []
+    remaining = np.ones(len(candidates), dtype=bool)
+    temperatures = current_temperatures
+    current_plate = None
+    while remaining.any():
+        leverage = np.einsum("ij,jk,ik->i", features, information_inverse, features)
+        cost = campaign_heat_time(temperatures, bed, nozzle)
+        if current_plate is not None:
+            cost = cost + np.where(plate != current_plate, 10.0 * heat_scale, 0.0)
+        score = np.where(remaining, leverage / (1.0 + cost / heat_scale), -np.inf)
+        index = int(np.argmax(score))
+        order.append(index)
+        remaining[index] = False
+        vector = information_inverse.dot(features[index])
+        information_inverse -= np.outer(vector, vector) / (1.0 + features[index].dot(vector))
+        temperatures = (bed[index], nozzle[index])
+        current_plate = plate[index]
+    return order
+
+
+def campaign_gcode(plan: list, pattern: dict, soak_time: int) -> list:
+    lines = list(pattern["defines"])
+    previous_plate = None
+    for index, (plate, bed_temperature, nozzle_temperature) in enumerate(plan):
+        lines.append(f"M117 DZOS: Campaign {index + 1}/{len(plan)}")
+        if plate != previous_plate:
+            lines += [f"M117 DZOS: Plate {plate}", "_DZOS_INTERACTION_BEEP", "PAUSE"]
+            previous_plate = plate
+        lines += [
+            "_DZOS_HOME",
+            "_RESET_FANS",
+            "_RESET_KINEMATICS",
+            f"DZOS_Z_OFFSET NOZZLETEMP={nozzle_temperature} BEDTEMP={bed_temperature} BEDTYPE='{plate}' FORCE_SOAK_TIME={soak_time}",
+            "M117 DZOS: Mesh..",
+            "_DZOS_BED_MESH",
+        ]
+        for line in pattern["block"]:
+            command = line.split(";")[0].split()
+            if command and command[0] in ("M104", "M109") and f"S{pattern['nozzle_temperature']}" in command:
+                line = f"{command[0]} S{nozzle_temperature}"
+            elif command and command[0] in ("M140", "M190") and f"S{pattern['bed_temperature']}" in command:
+                line = f"{command[0]} S{bed_temperature}"
+            lines.append(line)
+        lines += ["DZOS_Z_CAPTURE", "_RESET_KINEMATICS"]
+    lines += ["M117 DZOS: Campaign Done!", "TURN_OFF_HEATERS", "M84"]
+    return lines
+
+
+######################################################################################################################################################################################################
+# GEOMETRY
+######################################################################################################################################################################################################
+
+
+def gcode_file_key(file_path: str) -> tuple:
+    try:
+        file_stat = os.stat(file_path)
+    except (OSError, TypeError):
+        return None
+    return (file_path, file_stat.st_mtime, file_stat.st_size)
+
+
+def read_gcode_object_polygons(file_path: str) -> list:
+    polygons = []
+    try:
+        with open(file_path, "r") as file:
+            for line in file:
+                if line.startswith("EXCLUDE_OBJECT_START"):
+                    break
+                if not line.startswith("EXCLUDE_OBJECT_DEFINE"):
+                    continue
+                polygon_index = line.find("POLYGON=")
+                if polygon_index < 0:
+                    continue
+                polygon = json.loads(line[polygon_index + len("POLYGON="):].split()[0])
+                if polygon:
+                    polygons.append(np.asarray(polygon, dtype=float))
+    except (OSError, ValueError):
+        logging.exception(f"DZOS: Error Reading Gcode Objects")
+    return polygons
+
+
+def geometry_features(polygons: list, bed_center: list, margin: float=2.0) -> dict:
+    center = np.asarray(bed_center, dtype=float)
+    if not polygons:
+        return {
+            "objects": 0,
+            "min": [0.0, 0.0],
+            "max": [float(center[0] * 2), float(center[1] * 2)],
+            "area": 0.0,
+            "centroid": [float(center[0]), float(center[1])],
+            "max_radius": float(np.hypot(center[0], center[1])),
+            "max_center_size": float(np.max(center)),
+        }
+    lengths = np.array([len(polygon) for polygon in polygons])
+    points = np.concatenate(polygons)
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    next_index = np.arange(len(points)) + 1
+    next_index[starts + lengths - 1] = starts
+    x, y = points[:, 0], points[:, 1]
+    x_next, y_next = x[next_index], y[next_index]
+    cross = x * y_next - x_next * y
+    signed_areas = np.add.reduceat(cross, starts) / 2.0
+    areas = np.abs(signed_areas)
+    area = float(np.sum(areas))
+    if area > 0:
+        valid = signed_areas != 0
+        centroid_x = np.add.reduceat((x + x_next) * cross, starts)[valid] / (6.0 * signed_areas[valid])
+        centroid_y = np.add.reduceat((y + y_next) * cross, starts)[valid] / (6.0 * signed_areas[valid])
+        centroid = [float(np.average(centroid_x, weights=areas[valid])), float(np.average(centroid_y, weights=areas[valid]))]
+    else:
+        centroid = [float(value) for value in points.mean(axis=0)]
+    print_min = points.min(axis=0) - margin
+    print_max = points.max(axis=0) + margin
+    return {
+        "objects": int(len(polygons)),
+        "min": [float(value) for value in print_min],
+        "max": [float(value) for value in print_max],
+        "area": area,
+        "centroid": centroid,
+        "max_radius": float(np.max(np.hypot(x - center[0], y - center[1])) + margin),
+        "max_center_size": float(np.max(np.abs(np.concatenate((print_min, print_max)) - np.tile(center, 2)))),
+    }
+
+
 ######################################################################################################################################################################################################
 # ML
 ######################################################################################################################################################################################################
 
+CATEGORY_KINDS = ["bed_type", "filament_type", "nozzle_type"]
+NUMERIC_FEATURES = {
+    False: ["nozzle", "nozzle_temperature", "bed", "bed_local", "bed_temperature", "sensor_temperature", "offset"],
+    True: ["nozzle", "nozzle_temperature", "bed", "bed2", "bed_local", "bed_temperature", "bed_temperature2", "sensor_temperature", "sensor_temperature2", "offset"],
+}
+FACTOR_KEYS = {
+    "nozzle": "nozzle_factor",
+    "nozzle_temperature": "nozzle_temperature_factor",
+    "bed": "bed_factor",
+    "bed2": "bed_factor2",
+    "bed_local": "bed_local_factor",
+    "bed_temperature": "bed_temperature_factor",
+    "bed_temperature2": "bed_temperature_factor2",
+    "sensor_temperature": "sensor_temperature_factor",
+    "sensor_temperature2": "sensor_temperature_factor2",
+    "offset": "offset_factor",
+}
+
+
+def category_name(name) -> str:
+    name = str(name if name is not None else "none").strip().strip("'\"").lower()
+    return name or "none"
+
+
+def category_index(categories: dict, kind: str, name) -> int:
+    levels = categories.setdefault(kind, ["none"])
+    name = category_name(name)
+    if name not in levels:
+        levels.append(name)
+    return levels.index(name)
+
+
+def category_factor(factors: dict, name, legacy_keys: dict=None) -> float:
+    name = category_name(name)
+    if name in factors:
+        return factors[name]
+    if legacy_keys and legacy_keys.get(name) in factors:
+        return factors[legacy_keys[name]]
+    return 0.0
+
+
+def ml_robust_mean(values: np.ndarray, deviation: float=3.0) -> tuple:
+    median = np.median(values)
+    spread = 1.4826 * np.median(np.abs(values - median))
+    if spread > 0:
+        values = values[np.abs(values - median) <= deviation * spread]
+    return float(np.mean(values)), float(spread)
+
+
+def ml_surface_terms(x, y, bed_center: list) -> np.ndarray:
+    u = (np.asarray(x, dtype=float) - bed_center[0]) / bed_center[0]
+    v = (np.asarray(y, dtype=float) - bed_center[1]) / bed_center[1]
+    return np.stack([np.ones_like(u), u, v, u * u, u * v, v * v], axis=-1)
+
+
+def ml_surface_fit(points: np.ndarray, bed_center: list) -> np.ndarray:
+    terms = ml_surface_terms(points[:, 0], points[:, 1], bed_center)
+    if len(points) < 6:
+        terms = terms[:, :3]
+    coefficients = np.zeros(6, dtype=float)
+    coefficients[:terms.shape[1]] = np.linalg.lstsq(terms, points[:, 2], rcond=None)[0]
+    return coefficients
+
+
+def ml_surface_evaluate(coefficients: np.ndarray, x, y, bed_center: list):
+    return ml_surface_terms(x, y, bed_center).dot(coefficients)
+
+
+def change_point_state() -> dict:
+    return {
+        "positive": 0.0,
+        "negative": 0.0,
+        "positive_samples": 0,
+        "negative_samples": 0,
+        "positive_sum": 0.0,
+        "negative_sum": 0.0,
+        "alarms": [],
+    }
+
+
+def change_point_update(state: dict, residual: float, drift: float, threshold: float) -> dict:
+    for side, sign in (("positive", 1.0), ("negative", -1.0)):
+        value = state[side] + sign * residual - drift
+        if value > 0:
+            state[side] = value
+            state[f"{side}_samples"] += 1
+            state[f"{side}_sum"] += residual
+        else:
+            state[side] = 0.0
+            state[f"{side}_samples"] = 0
+            state[f"{side}_sum"] = 0.0
+    for side in ("positive", "negative"):
+        if state[side] > threshold:
+            alarm = {
+                "step": float(state[f"{side}_sum"] / state[f"{side}_samples"]),
+                "samples": state[f"{side}_samples"],
+            }
+            alarms = state.get("alarms", [])
+            state.update(change_point_state())
+            state["alarms"] = alarms
+            return alarm
+    return None
+
+
 def ml_stat_dict(input_list: list[float]) -> dict:
     return {
         "last_print" : float(input_list[-1]),
@@ -744,197 +2686,145 @@ def ml_stat_dict(input_list: list[float]) -> dict:
     }
 
 
-def ml_linear_optimize(print_data: dict, bed_type_dict: dict, outlier_sample_min: int, outlier_deviation: float) -> dict:
-    nozzle_list = []
-    nozzle_temperature_list = []
-    bed_list = []
-    bed_temperature_list = []
-    sensor_temperature_list = []
-    bed_type_encoded_list = []
-    z_list = []
+def ml_linear_optimize(print_data: list, categories: dict, outlier_sample_min: int, outlier_deviation: float, category_ridge: float=0.1, prior: dict=None, prior_strength: float=0.0) -> dict:
+    return ml_categorical_optimize(print_data, categories, outlier_sample_min, outlier_deviation, False, category_ridge, prior, prior_strength)
 
-    bed_type_indices = {bed : index for index, bed in enumerate(bed_type_dict.keys())}
 
-    for entry in print_data:
-        nozzle: float = entry.get('e_pressure_nozzle_z')
-        nozzle_temperature = entry.get('nozzle_temperature')
-        bed: float = entry.get('d_bed_z')
-        bed_temperature = entry.get('bed_temperature')
-        bed_type: str = entry.get('bed_type')
-        sensor_temperature = entry.get('sensor_temperature', 0.0)
-        z_offset: float = entry.get('z_offset')
-        if not z_offset:
-            continue
-        nozzle_list.append(-nozzle)
-        nozzle_temperature_list.append(float(nozzle_temperature))
-        bed_list.append(bed)
-        bed_temperature_list.append(float(bed_temperature))
-        one_hot = [0.0] * len(bed_type_dict)
-        one_hot[bed_type_indices[bed_type.lower()]] = 1.0
-        bed_type_encoded_list.append(one_hot)        
-        sensor_temperature_list.append(float(sensor_temperature))
-        z_list.append(z_offset)
-        
+def ml_polynomial_optimize(print_data: list, categories: dict, outlier_sample_min: int, outlier_deviation: float, category_ridge: float=0.1, prior: dict=None, prior_strength: float=0.0) -> dict:
+    return ml_categorical_optimize(print_data, categories, outlier_sample_min, outlier_deviation, True, category_ridge, prior, prior_strength)
 
-        
-    samples = len(z_list)
-    if samples < 2:
-        return
-    
-    data = np.column_stack([
-        np.array(nozzle_list, dtype=float),
-        np.array(nozzle_temperature_list, dtype=float),
-        np.array(bed_list, dtype=float),
-        np.array(bed_temperature_list, dtype=float),
-        np.array(bed_type_encoded_list, dtype=float),
-        np.array(sensor_temperature_list, dtype=float),
-        np.ones(samples, dtype=float)
-    ])
-    target = np.array(z_list, dtype=float)
-
-    result = np.linalg.lstsq(data, target, rcond=None)
 
-    if samples >= outlier_sample_min:
-        coefficients, processed_data, processed_target, outlier_indices = ml_remove_outliers(result, data, target, outlier_deviation)
-    else:
-        coefficients = result[0]
-        processed_data = data
-        processed_target = target
-        outlier_indices = []
-    
-    nozzle_factor = coefficients[0]
-    nozzle_temperature_factor = coefficients[1]
-    bed_factor = coefficients[2]
-    bed_temperature_factor = coefficients[3]
-    bed_type_factors = {
-        "none" : float(coefficients[4]),
-        "cp": float(coefficients[5]),
-        "ht": float(coefficients[6]),
-        "eng": float(coefficients[7]),
-        "pei": float(coefficients[8]),
-        "tcp": float(coefficients[9]),
-        "st": float(coefficients[10])
-    }
-    sensor_temperature_factor = coefficients[11]
-    offset = coefficients[12]
-    factor_dict = {
-        "nozzle_factor": float(nozzle_factor),
-        "nozzle_temperature_factor": float(nozzle_temperature_factor),
-        "bed_factor": float(bed_factor),
-        "bed_temperature_factor": float(bed_temperature_factor),
-        "bed_type_factors": bed_type_factors,
-        "sensor_temperature_factor": float(sensor_temperature_factor),
-        "offset_factor": float(offset),
-        "statistics" : ml_get_statistics(coefficients, processed_data, processed_target, polynomial=False)
+def ml_prior_vector(prior: dict, categories: dict, polynomial: bool) -> tuple:
+    coefficients = np.array([prior.get(FACTOR_KEYS[feature], 0.0) for feature in NUMERIC_FEATURES[polynomial]], dtype=float)
+    category_coefficients = {
+        kind: np.array([prior.get(f"{kind}_factors", {}).get(name, 0.0) for name in categories[kind]], dtype=float)
+        for kind in categories
     }
-    factor_dict['statistics']['samples'] = int(samples)
-    factor_dict['statistics']['outliers'] = int(len(target) - len(processed_target))
-    factor_dict['statistics']['outlier_indices'] = outlier_indices
-    return factor_dict
+    return coefficients, category_coefficients
 
 
-def ml_polynomial_optimize(print_data: dict, bed_type_dict: dict, outlier_sample_min: int, outlier_deviation: float) -> dict:
-    nozzle_list = []
-    nozzle_temperature_list = []
-    bed_list = []
-    bed_temperature_list = []
-    sensor_temperature_list = []
-    bed_type_encoded_list = []
-    z_list = []
+def ml_numeric_row(entry: dict, polynomial: bool) -> list:
+    nozzle = -float(entry.get('e_pressure_nozzle_z'))
+    nozzle_temperature = float(entry.get('nozzle_temperature'))
+    bed = float(entry.get('d_bed_z'))
+    bed_local = float(entry.get('d_bed_z_local', bed)) - bed
+    bed_temperature = float(entry.get('bed_temperature'))
+    sensor_temperature = float(entry.get('sensor_temperature', 0.0) or 0.0)
+    if polynomial:
+        return [nozzle, nozzle_temperature, bed, bed ** 2, bed_local, bed_temperature, bed_temperature ** 2, sensor_temperature, sensor_temperature ** 2, 1.0]
+    return [nozzle, nozzle_temperature, bed, bed_local, bed_temperature, sensor_temperature, 1.0]
 
-    bed_type_indices = {bed : index for index, bed in enumerate(bed_type_dict.keys())}
-    
+
+def ml_predict(factor_dict: dict, entry: dict) -> float:
+    polynomial = "bed_factor2" in factor_dict
+    row = ml_numeric_row(entry, polynomial)
+    prediction = sum(factor_dict.get(FACTOR_KEYS[feature], 0.0) * value for feature, value in zip(NUMERIC_FEATURES[polynomial], row))
+    for kind in CATEGORY_KINDS:
+        prediction += category_factor(factor_dict.get(f"{kind}_factors", {}), entry.get(kind))
+    return float(prediction)
+
+
+def model_factors(factor_dict: dict) -> dict:
+    return {key: value for key, value in factor_dict.items() if key in FACTOR_KEYS.values() or key.endswith("_type_factors")}
+
+
+def ml_design(print_data: list, categories: dict, polynomial: bool) -> tuple:
+    rows = []
+    codes = {kind: [] for kind in categories}
+    target = []
+    weights = []
     for entry in print_data:
-        nozzle: float = entry.get('e_pressure_nozzle_z')
-        nozzle_temperature = entry.get('nozzle_temperature')
-        bed: float = entry.get('d_bed_z')
-        bed_temperature = entry.get('bed_temperature')
-        bed_type: str = entry.get('bed_type')
-        sensor_temperature = entry.get('sensor_temperature', 0.0)
-        z_offset: float = entry.get('z_offset')
+        z_offset = entry.get('z_offset')
         if z_offset is None:
             continue
-        nozzle_list.append(-nozzle)
-        nozzle_temperature_list.append(float(nozzle_temperature))
-        bed_list.append(bed)
-        bed_temperature_list.append(float(bed_temperature))
-       
-        one_hot = [0.0] * len(bed_type_dict)
-        one_hot[bed_type_indices[bed_type.lower()]] = 1.0
-        bed_type_encoded_list.append(one_hot)
-
-        sensor_temperature_list.append(float(sensor_temperature))
-        z_list.append(float(z_offset))        
-        
-    samples = len(z_list)
-    if samples < 2:
-        return
-    
-    polynomial_data = np.column_stack([
-        np.array(nozzle_list, dtype=float),
-        np.array(nozzle_temperature_list, dtype=float),
-        np.array(bed_list, dtype=float),
-        np.array(bed_list, dtype=float) ** 2,
-        np.array(bed_temperature_list, dtype=float),
-        np.array(bed_temperature_list, dtype=float) ** 2,
-        np.array(bed_type_encoded_list, dtype=float),
-        np.array(sensor_temperature_list, dtype=float),
-        np.array(sensor_temperature_list, dtype=float) ** 2,
-        np.ones(samples, dtype=float)
-    ])
-    target = np.array(z_list, dtype=float)
-
-    result = np.linalg.lstsq(polynomial_data, target, rcond=None)
+        rows.append(ml_numeric_row(entry, polynomial))
+        for kind in categories:
+            codes[kind].append(category_index(categories, kind, entry.get(kind)))
+        target.append(float(z_offset))
+        weights.append(float(entry.get('weight', 1.0)))
+    data = np.array(rows, dtype=float).reshape(-1, len(NUMERIC_FEATURES[polynomial]))
+    codes = {kind: np.array(codes[kind], dtype=int) for kind in categories}
+    return data, codes, np.array(target, dtype=float), np.array(weights, dtype=float)
+
+
+def ml_sparse_solve(data: np.ndarray, codes: dict, sizes: dict, target: np.ndarray, weights: np.ndarray, ridge: float, prior: tuple=None, prior_strength: float=0.0) -> tuple:
+    features = data.shape[1]
+    offsets = {}
+    total = features
+    for kind in codes:
+        offsets[kind] = total
+        total += sizes[kind]
+    normal = np.zeros((total, total), dtype=float)
+    right = np.zeros(total, dtype=float)
+    weighted_data = data * weights[:, None]
+    normal[:features, :features] = data.T.dot(weighted_data)
+    right[:features] = weighted_data.T.dot(target)
+    for index, kind in enumerate(codes):
+        code, size, offset = codes[kind], sizes[kind], offsets[kind]
+        category_data = np.zeros((size, features), dtype=float)
+        np.add.at(category_data, code, weighted_data)
+        normal[offset:offset + size, :features] = category_data
+        normal[:features, offset:offset + size] = category_data.T
+        normal[offset:offset + size, offset:offset + size] += np.diag(np.bincount(code, weights=weights, minlength=size) + ridge)
+        right[offset:offset + size] = np.bincount(code, weights=weights * target, minlength=size)
+        for other_kind in list(codes)[index + 1:]:
+            other_offset, other_size = offsets[other_kind], sizes[other_kind]
+            cross = np.zeros((size, other_size), dtype=float)
+            np.add.at(cross, (code, codes[other_kind]), weights)
+            normal[offset:offset + size, other_offset:other_offset + other_size] = cross
+            normal[other_offset:other_offset + other_size, offset:offset + size] = cross.T
+    if prior is not None and prior_strength:
+        # pseudo-samples at the base model, scaled per feature so the strength reads as a sample count
+        penalty = np.full(total, float(prior_strength))
+        penalty[:features] *= np.diag(normal)[:features] / max(float(weights.sum()), 1.0)
+        center = np.concatenate([prior[0]] + [prior[1][kind] for kind in codes])
+        normal[np.diag_indices(total)] += penalty
+        right += penalty * center
+        right[features:] += ridge * center[features:]
+    solution = np.linalg.lstsq(normal, right, rcond=None)[0]
+    coefficients = solution[:features]
+    category_coefficients = {kind: solution[offsets[kind]:offsets[kind] + sizes[kind]] for kind in codes}
+    return coefficients, category_coefficients
+
+
+def ml_sparse_predict(data: np.ndarray, codes: dict, coefficients: np.ndarray, category_coefficients: dict) -> np.ndarray:
+    predictions = data.dot(coefficients)
+    for kind in codes:
+        predictions = predictions + category_coefficients[kind][codes[kind]]
+    return predictions
+
 
+def ml_categorical_optimize(print_data: list, categories: dict, outlier_sample_min: int, outlier_deviation: float, polynomial: bool, category_ridge: float=0.1, prior: dict=None, prior_strength: float=0.0) -> dict:
+    data, codes, target, weights = ml_design(print_data, categories, polynomial)
+    samples = len(target)
+    if samples < (1 if prior else 2):
+        return
+    sizes = {kind: len(categories[kind]) for kind in categories}
+    prior = ml_prior_vector(prior, categories, polynomial) if prior else None
+    coefficients, category_coefficients = ml_sparse_solve(data, codes, sizes, target, weights, category_ridge, prior, prior_strength)
+    mask = np.ones(samples, dtype=bool)
     if samples >= outlier_sample_min:
-        coefficients, processed_data, processed_target, outlier_indices = ml_remove_outliers(result, polynomial_data, target, outlier_deviation)
-    else:
-        coefficients = result[0]
-        processed_data = polynomial_data
-        processed_target = target
-        outlier_indices = []
-
-    nozzle_factor = coefficients[0]
-    nozzle_temperature_factor = coefficients[1]
-    bed_factor = coefficients[2]
-    bed_factor2 = coefficients[3]
-    bed_temperature_factor = coefficients[4]
-    bed_temperature_factor2 = coefficients[5]
-    bed_type_factors = {
-        "none" : float(coefficients[6]),
-        "cp": float(coefficients[7]),
-        "ht": float(coefficients[8]),
-        "eng": float(coefficients[9]),
-        "pei": float(coefficients[10]),
-        "tcp": float(coefficients[11]),
-        "st": float(coefficients[12])
-    }
-    sensor_temperature_factor = coefficients[13]
-    sensor_temperature_factor2 = coefficients[14]
-    offset = coefficients[15]
-
-    factor_dict = {
-        "nozzle_factor": float(nozzle_factor),
-        "nozzle_temperature_factor": float(nozzle_temperature_factor),
-        "bed_factor": float(bed_factor),
-        "bed_factor2": float(bed_factor2),
-        "bed_temperature_factor": float(bed_temperature_factor),
-        "bed_temperature_factor2": float(bed_temperature_factor2),
-        "bed_type_factors": bed_type_factors,
-        "sensor_temperature_factor": float(sensor_temperature_factor),
-        "sensor_temperature_factor2": float(sensor_temperature_factor2),
-        "offset_factor": float(offset),
-        "statistics": ml_get_statistics(coefficients, processed_data, processed_target, polynomial=True)
-    }
+        residuals = target - ml_sparse_predict(data, codes, coefficients, category_coefficients)
+        mask = ml_outlier_mask(residuals, outlier_deviation)
+        if mask.sum() < len(mask) and mask.sum() >= 2:
+            masked_codes = {kind: codes[kind][mask] for kind in categories}
+            coefficients, category_coefficients = ml_sparse_solve(data[mask], masked_codes, sizes, target[mask], weights[mask], category_ridge, prior, prior_strength)
+        else:
+            mask = np.ones(samples, dtype=bool)
+    processed_codes = {kind: codes[kind][mask] for kind in categories}
+    factor_dict = {}
+    for feature, coefficient in zip(NUMERIC_FEATURES[polynomial], coefficients):
+        factor_dict[FACTOR_KEYS[feature]] = float(coefficient)
+    for kind in categories:
+        factor_dict[f"{kind}_factors"] = {name: float(value) for name, value in zip(categories[kind], category_coefficients[kind])}
+    factor_dict["statistics"] = ml_get_statistics(coefficients, category_coefficients, categories, data[mask], processed_codes, target[mask], polynomial)
     factor_dict['statistics']['samples'] = int(samples)
-    factor_dict['statistics']['outliers'] = int(samples - len(processed_target))
-    factor_dict['statistics']['outlier_indices'] = outlier_indices
+    factor_dict['statistics']['outliers'] = int(samples - mask.sum())
+    factor_dict['statistics']['outlier_indices'] = [str(outlier) for outlier in np.where(~mask)[0]]
     return factor_dict
 
 
-def ml_remove_outliers(result, data: np.ndarray, target: np.ndarray, outlier_deviation: float) -> tuple:
-    predicted = data.dot(result[0])
-    residuals = target - predicted
+def ml_outlier_mask(residuals: np.ndarray, outlier_deviation: float) -> np.ndarray:
     median = np.median(residuals)
     mad = np.median(np.abs(residuals - median))
     if mad > 0:
@@ -942,122 +2832,325 @@ def ml_remove_outliers(result, data: np.ndarray, target: np.ndarray, outlier_dev
     else:
         std_res = float(np.std(residuals))
         thresh = outlier_deviation * std_res if std_res > 0 else 1e-8
-    mask = np.abs(residuals - median) <= thresh
-    if mask.sum() < len(mask) and mask.sum() >= 2:
-        data_filtered = data[mask]
-        target_filtered = target[mask]
-        refined_result = np.linalg.lstsq(data_filtered, target_filtered, rcond=None)
-        coefficients = refined_result[0]
-        processed_data, processed_target = data_filtered, target_filtered
-    else:
-        processed_data, processed_target = data, target
-        coefficients = result[0]
-    outlier_indices = np.where(~mask)[0]
-    outlier_indices_str = [str(outlier) for outlier in outlier_indices]
-    return coefficients, processed_data, processed_target, outlier_indices_str
+    return np.abs(residuals - median) <= thresh
+
+
+def ml_get_statistics(coefficients: np.ndarray, category_coefficients: dict, categories: dict, data: np.ndarray, codes: dict, target: np.ndarray, polynomial: bool) -> dict:
+    predictions = ml_sparse_predict(data, codes, coefficients, category_coefficients)
+    statistics = {feature: ml_stat_dict(data[:, index] * coefficients[index]) for index, feature in enumerate(NUMERIC_FEATURES[polynomial])}
+    statistics["categories"] = {}
+    for kind in categories:
+        counts = np.bincount(codes[kind], minlength=len(categories[kind]))
+        statistics["categories"][kind] = {
+            name: ml_stat_dict(np.where(codes[kind] == index, category_coefficients[kind][index], 0.0))
+            for index, name in enumerate(categories[kind]) if counts[index]
+        }
+    statistics["error"] = float(np.mean(np.abs(predictions - target)))
+    return statistics
+
+
+def ml_model_statistics(factor_dict: dict, print_data: list, categories: dict, polynomial: bool) -> dict:
+    data, codes, target, _ = ml_design(print_data, categories, polynomial)
+    if not len(target):
+        return None
+    coefficients = np.array([factor_dict.get(FACTOR_KEYS[feature], 0.0) for feature in NUMERIC_FEATURES[polynomial]], dtype=float)
+    category_coefficients = {
+        kind: np.array([category_factor(factor_dict.get(f"{kind}_factors", {}), name) for name in categories[kind]], dtype=float)
+        for kind in categories
+    }
+    statistics = ml_get_statistics(coefficients, category_coefficients, categories, data, codes, target, polynomial)
+    statistics.update({"samples": int(len(target)), "outliers": 0, "outlier_indices": []})
+    return statistics
 
 
-def ml_get_statistics(coefficients, data: np.ndarray, target: np.ndarray, polynomial: bool) -> dict:
-    if polynomial:
-        (
-            nozzle_factor, 
-            nozzle_temperature_factor, 
-            bed_factor, bed2_factor, 
-            bed_temperature_factor, 
-            bed_temperature2_factor, 
-            bed_type_factor_none,
-            bed_type_factor_cp,
-            bed_type_factor_ht,
-            bed_type_factor_eng,
-            bed_type_factor_pei,
-            bed_type_factor_tcp,
-            bed_type_factor_st,
-            sensor_temperature_factor, 
-            sensor_temperature_factor2, 
-            offset
-        ) = coefficients
+######################################################################################################################################################################################################
+# FLEET
+######################################################################################################################################################################################################
+
+
+FLEET_KIND = "printer"
+
+
+def fleet_socket_address(address: str) -> tuple:
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, os.path.expanduser(address[len("unix:"):])
+    host, _, port = address.rpartition(":")
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+def fleet_request(address: str, message: dict, timeout: float=2.0) -> dict:
+    family, target = fleet_socket_address(address)
+    with socket.socket(family, socket.SOCK_STREAM) as connection:
+        connection.settimeout(timeout)
+        connection.connect(target)
+        connection.sendall((json.dumps(message) + "\n").encode())
+        response = b""
+        while not response.endswith(b"\n"):
+            chunk = connection.recv(65536)
+            if not chunk:
+                break
+            response += chunk
+    response = json.loads(response.decode())
+    if "error" in response:
+        raise ValueError(response["error"])
+    return response
+
+
+class FleetModel:
+    """Captures pooled from all printers; one batched fit gives shared coefficients plus a shrunken per-printer offset."""
+    def __init__(self, data_path: str, outlier_sample_min: int=20, outlier_deviation: float=3.0, category_ridge: float=0.1, polynomial_sample_min: int=20):
+        self.file_path = os.path.join(data_path, FLEET_DATA_FILENAME)
+        self.outlier_sample_min = outlier_sample_min
+        self.outlier_deviation = outlier_deviation
+        self.category_ridge = category_ridge
+        self.polynomial_sample_min = polynomial_sample_min
+        self.lock = threading.Lock()
+        # refuse to start on an unreadable pool rather than overwrite it with the next push
+        self.records = load_data(self.file_path) or {}
+        self.timestamps = {printer: {record["timestamp"] for record in records} for printer, records in self.records.items()}
+        self.models = {}
+        self.cache = {}
+
+
+    def push(self, printer: str, records: list) -> dict:
+        with self.lock:
+            known = self.timestamps.setdefault(printer, set())
+            fresh = [record for record in records if record.get("timestamp") not in known]
+            if fresh:
+                self.records.setdefault(printer, []).extend(fresh)
+                known.update(record["timestamp"] for record in fresh)
+                write_data(self.file_path, self.records)
+                self.models.clear()
+                self.cache.clear()
+            return {"added": len(fresh), "samples": sum(len(records) for records in self.records.values())}
+
+
+    def pull(self, printer: str, polynomial: bool) -> dict:
+        with self.lock:
+            key = (printer, polynomial)
+            if key not in self.cache:
+                model = self._fit(polynomial)
+                self.cache[key] = self._printer_model(model, printer) if model else None
+            return {"model": self.cache[key]}
+
+
+    def status(self) -> dict:
+        with self.lock:
+            return {"printers": {printer: len(records) for printer, records in self.records.items()}}
+
+
+    def _fit(self, polynomial: bool) -> dict:
+        if polynomial not in self.models:
+            pooled_data = [dict(record, printer=printer) for printer, records in self.records.items() for record in records]
+            polynomial = polynomial and len(pooled_data) > self.polynomial_sample_min
+            categories = {kind: ["none"] for kind in CATEGORY_KINDS + [FLEET_KIND]}
+            self.models[polynomial] = ml_categorical_optimize(pooled_data, categories, self.outlier_sample_min, self.outlier_deviation, polynomial, self.category_ridge)
+        return self.models.get(polynomial) or self.models.get(False)
+
+
+    def _printer_model(self, model: dict, printer: str) -> dict:
+        printer_model = dict(model)
+        printer_factors = printer_model.pop(f"{FLEET_KIND}_factors")
+        printer_model["offset_factor"] = model["offset_factor"] + category_factor(printer_factors, printer)
+        printer_model["fleet_printers"] = len(self.records)
+        printer_model["fleet_samples"] = sum(len(records) for records in self.records.values())
+        return printer_model
+
+
+class FleetRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                message = json.loads(line.decode())
+                op = message.get("op")
+                if op == "push":
+                    response = self.server.fleet.push(category_name(message["printer"]), message.get("records", []))
+                elif op == "pull":
+                    response = self.server.fleet.pull(category_name(message["printer"]), bool(message.get("polynomial")))
+                elif op == "status":
+                    response = self.server.fleet.status()
+                else:
+                    response = {"error": f"unknown op {op}"}
+            except (ValueError, KeyError, TypeError) as error:
+                response = {"error": str(error)}
+            self.wfile.write((json.dumps(response) + "\n").encode())
+
+
+def fleet_serve(address: str, data_path: str, **model_options):
+    os.makedirs(data_path, exist_ok=True)
+    replay_journals([data_path])
+    family, target = fleet_socket_address(address)
+    if family == socket.AF_UNIX:
+        if os.path.exists(target):
+            os.remove(target)
+        server = socketserver.ThreadingUnixStreamServer(target, FleetRequestHandler)
     else:
-        (
-            nozzle_factor, 
-            nozzle_temperature_factor, 
-            bed_factor, 
-            bed_temperature_factor, 
-            bed_type_factor_none,
-            bed_type_factor_cp,
-            bed_type_factor_ht,
-            bed_type_factor_eng,
-            bed_type_factor_pei,
-            bed_type_factor_tcp,
-            bed_type_factor_st,
-            sensor_temperature_factor, 
-            offset 
-        ) = coefficients
-    predictions = data.dot(coefficients)
-    error = float(np.mean(np.abs(predictions - target)))
-    if polynomial:
-        predicted_nozzle = data[:, 0] * nozzle_factor
-        predicted_nozzle_temperature = data[:, 1] * nozzle_temperature_factor
-        predicted_bed = data[:, 2] * bed_factor
-        predicted_bed2 = data[:, 3] * bed2_factor
-        predicted_bed_temperature = data[:, 4] * bed_temperature_factor
-        predicted_bed_temperature2 = data[:, 5] * bed_temperature2_factor
-        predicted_bed_none_factor = data[:, 6] * bed_type_factor_none
-        predicted_bed_cp_factor = data[:, 7] * bed_type_factor_cp
-        predicted_bed_ht_factor = data[:, 8] * bed_type_factor_ht
-        predicted_bed_eng_factor = data[:, 9] * bed_type_factor_eng
-        predicted_bed_pei_factor = data[:, 10] * bed_type_factor_pei
-        predicted_bed_tcp_factor = data[:, 11] * bed_type_factor_tcp
-        predicted_bed_st_factor = data[:, 12] * bed_type_factor_st
-        predicted_sensor_temperature = data[:, 13] * sensor_temperature_factor
-        predicted_sensor_temperature2 = data[:, 14] * sensor_temperature_factor2
-        predicted_offset = data[:, 15] * offset
-        statistics = {
-            "nozzle": ml_stat_dict(predicted_nozzle),
-            "nozzle_temperature": ml_stat_dict(predicted_nozzle_temperature),
-            "bed": ml_stat_dict(predicted_bed),
-            "bed2": ml_stat_dict(predicted_bed2),
-            "bed_temperature": ml_stat_dict(predicted_bed_temperature),
-            "bed_temperature2": ml_stat_dict(predicted_bed_temperature2),
-            "bed_type_factor_none": ml_stat_dict(predicted_bed_none_factor),
-            "bed_type_factor_cp": ml_stat_dict(predicted_bed_cp_factor),
-            "bed_type_factor_ht": ml_stat_dict(predicted_bed_ht_factor),
-            "bed_type_factor_eng": ml_stat_dict(predicted_bed_eng_factor),
-            "bed_type_factor_pei": ml_stat_dict(predicted_bed_pei_factor),
-            "bed_type_factor_tcp": ml_stat_dict(predicted_bed_tcp_factor),
-            "bed_type_factor_st": ml_stat_dict(predicted_bed_st_factor),
-            "sensor_temperature": ml_stat_dict(predicted_sensor_temperature),
-            "sensor_temperature2": ml_stat_dict(predicted_sensor_temperature2),
-            "offset": ml_stat_dict(predicted_offset),
-            "error": error,
-        }
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        server = socketserver.ThreadingTCPServer(target, FleetRequestHandler)
+    server.daemon_threads = True
+    server.fleet = FleetModel(data_path, **model_options)
+    print(f"DZOS: Fleet serving on {address}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+######################################################################################################################################################################################################
+# CLI
+######################################################################################################################################################################################################
+
+
+def cli_load(file_paths: list) -> list:
+    records = []
+    for file_path in file_paths:
+        data = read_data(file_path)
+        if isinstance(data, dict):
+            data = [dict(record, printer=printer) for printer, printer_records in data.items() for record in printer_records]
+        if not isinstance(data, list):
+            raise SystemExit(f"DZOS: Error Reading {file_path}")
+        records += data
+    return records
+
+
+def cli_merge(records: list) -> tuple:
+    stamped = [record for record in records if record.get("timestamp") is not None]
+    timestamps = np.array([record["timestamp"] for record in stamped], dtype=float)
+    _, first = np.unique(timestamps, return_index=True)
+    return [stamped[index] for index in first], len(stamped) - len(first), len(records) - len(stamped)
+
+
+def cli_fit(records: list, mode: str, outlier_sample_min: int, outlier_deviation: float, category_ridge: float) -> tuple:
+    categories = {kind: ["none"] for kind in CATEGORY_KINDS}
+    polynomial = mode == "polynomial"
+    factor_dict = ml_categorical_optimize(records, categories, outlier_sample_min, outlier_deviation, polynomial, category_ridge)
+    if not factor_dict:
+        raise SystemExit("DZOS: Not Enough Data!")
+    return factor_dict, categories, polynomial
+
+
+def cli_columns(records: list, factor_dict: dict, categories: dict, polynomial: bool) -> dict:
+    records = [record for record in records if record.get("z_offset") is not None]
+    data, codes, target, weights = ml_design(records, categories, polynomial)
+    coefficients, category_coefficients = ml_prior_vector(factor_dict, categories, polynomial)
+    prediction = ml_sparse_predict(data, codes, coefficients, category_coefficients)
+    columns = {"timestamp": np.array([record.get("timestamp", 0.0) for record in records], dtype=float)}
+    for kind in categories:
+        columns[kind] = np.array(categories[kind], dtype=str)[codes[kind]]
+    for index, feature in enumerate(NUMERIC_FEATURES[polynomial]):
+        columns[feature] = data[:, index]
+        columns[f"{feature}_contribution"] = data[:, index] * coefficients[index]
+    for kind in categories:
+        columns[f"{kind}_contribution"] = category_coefficients[kind][codes[kind]]
+    columns["weight"] = weights
+    columns["z_offset"] = target
+    columns["prediction"] = prediction
+    columns["residual"] = target - prediction
+    return columns
+
+
+def cli_export(file_path: str, columns: dict):
+    if file_path.endswith(".npz"):
+        np.savez_compressed(file_path, **columns)
+        return
+    table = np.column_stack([column.astype(str) if column.dtype.kind in "US" else np.char.mod("%.12g", column) for column in columns.values()])
+    np.savetxt(file_path, table, fmt="%s", delimiter=",", header=",".join(columns), comments="")
+
+
+def cli_respond_statistics(factor_dict: dict, polynomial: bool):
+    statistics = factor_dict["statistics"]
+    print(f"DZOS: Type: {'Polynomial' if polynomial else 'Linear'}")
+    print(f"DZOS: Samples: {statistics['samples']} Outliers: {statistics['outliers']} Error: ±{statistics['error']:.3f}")
+    for feature in NUMERIC_FEATURES[polynomial]:
+        print(f"DZOS: {feature}: {factor_dict[FACTOR_KEYS[feature]]:+.6f} mean {statistics[feature]['mean']:+.3f}")
+    for kind, category_statistics in statistics["categories"].items():
+        for name, category_stat in category_statistics.items():
+            print(f"DZOS: {kind} {name}: {category_stat['mean']:+.3f}")
+
+
+def klippy_request(socket_path: str, method: str, params: dict, timeout: float=5.0) -> dict:
+    # the Klippy API socket frames each JSON message with a 0x03 byte
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.settimeout(timeout)
+        connection.connect(os.path.expanduser(socket_path))
+        connection.sendall(json.dumps({"id": 1, "method": method, "params": params}).encode() + b"\x03")
+        response = b""
+        while not response.endswith(b"\x03"):
+            chunk = connection.recv(65536)
+            if not chunk:
+                break
+            response += chunk
+    response = json.loads(response.rstrip(b"\x03").decode())
+    if "error" in response:
+        raise ValueError(response["error"].get("message", response["error"]))
+    return response.get("result", {})
+
+
+def main(argv: list=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog="dzos", description="DZOS offline tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    merge = commands.add_parser("merge", help="merge print data files, dropping duplicate captures by timestamp")
+    merge.add_argument("inputs", nargs="+", help="print data or fleet data files")
+    merge.add_argument("-o", "--output", required=True, help="merged print data file")
+    import_data = commands.add_parser("import", help="merge print data files into an existing print data file")
+    import_data.add_argument("target", help="print data file to update, e.g. ~/printer_data/config/dzos_print_data.json")
+    import_data.add_argument("inputs", nargs="+", help="print data or fleet data files")
+    for name, help_text in (("fit", "fit a model offline and print the statistics"), ("export", "export per-print features, contributions and residuals")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("inputs", nargs="+", help="print data or fleet data files")
+        command.add_argument("--mode", choices=["linear", "polynomial"], default="linear")
+        command.add_argument("--outlier-sample-min", type=int, default=20)
+        command.add_argument("--outlier-deviation", type=float, default=3.0)
+        command.add_argument("--category-ridge", type=float, default=0.1)
+        if name == "fit":
+            command.add_argument("--static", help="static data file to write the factors into")
+        else:
+            command.add_argument("-o", "--output", required=True, help=".csv or .npz columnar output")
+    soak = commands.add_parser("soak", help="control a running soak; works while DZOS_Z_OFFSET holds the G-code queue")
+    soak.add_argument("action", nargs="?", choices=["status", "pause", "resume", "skip"], default="status")
+    soak.add_argument("--extend", type=float, default=0.0, help="seconds to add, negative to shorten")
+    soak.add_argument("--socket", default=KLIPPY_SOCKET_PATH, help="Klippy API socket")
+    serve = commands.add_parser("fleet-serve", help="run the fleet model-sharing service")
+    serve.add_argument("--address", default="unix:/tmp/dzos_fleet.sock", help="unix:<path> or <host>:<port>")
+    serve.add_argument("--data", default=FLEET_PATH, help="directory for the pooled fleet data")
+    serve.add_argument("--category-ridge", type=float, default=0.1, help="shrinkage of plate, filament, nozzle and printer offsets")
+    arguments = parser.parse_args(argv)
+    if arguments.command == "soak":
+        try:
+            status = klippy_request(arguments.socket, "dzos/soak", {"action": arguments.action, "extend": arguments.extend})
+        except (OSError, ValueError) as error:
+            raise SystemExit(f"DZOS: Soak Request Failed! {error}")
+        print(f"DZOS: Soak {status.get('state')} {status.get('remaining', 0.0):.0f}s")
+    elif arguments.command == "fleet-serve":
+        fleet_serve(arguments.address, arguments.data, category_ridge=arguments.category_ridge)
+    elif arguments.command in ("merge", "import"):
+        inputs = arguments.inputs
+        output = arguments.output if arguments.command == "merge" else arguments.target
+        if arguments.command == "import" and os.path.exists(output):
+            inputs = [output] + inputs
+        merged, duplicates, pending = cli_merge(cli_load(inputs))
+        write_data(output, merged)
+        print(f"DZOS: {len(merged)} records, {duplicates} duplicates dropped, {pending} uncaptured dropped -> {output}")
     else:
-        predicted_nozzle = data[:, 0] * nozzle_factor
-        predicted_nozzle_temperature = data[:, 1] * nozzle_temperature_factor
-        predicted_bed = data[:, 2] * bed_factor
-        predicted_bed_temperature = data[:, 3] * bed_temperature_factor
-        predicted_bed_none_factor = data[:, 4] * bed_type_factor_none
-        predicted_bed_cp_factor = data[:, 5] * bed_type_factor_cp
-        predicted_bed_ht_factor = data[:, 6] * bed_type_factor_ht
-        predicted_bed_eng_factor = data[:, 7] * bed_type_factor_eng
-        predicted_bed_pei_factor = data[:, 8] * bed_type_factor_pei
-        predicted_bed_tcp_factor = data[:, 9] * bed_type_factor_tcp
-        predicted_bed_st_factor = data[:, 10] * bed_type_factor_st
-        predicted_sensor_temperature = data[:, 11] * sensor_temperature_factor
-        predicted_offset = data[:, 12] * offset
-        statistics = {
-            "nozzle": ml_stat_dict(predicted_nozzle),
-            "nozzle_temperature": ml_stat_dict(predicted_nozzle_temperature),
-            "bed": ml_stat_dict(predicted_bed),
-            "bed_temperature": ml_stat_dict(predicted_bed_temperature),
-            "bed_type_factor_none": ml_stat_dict(predicted_bed_none_factor),
-            "bed_type_factor_cp": ml_stat_dict(predicted_bed_cp_factor),
-            "bed_type_factor_ht": ml_stat_dict(predicted_bed_ht_factor),
-            "bed_type_factor_eng": ml_stat_dict(predicted_bed_eng_factor),
-            "bed_type_factor_pei": ml_stat_dict(predicted_bed_pei_factor),
-            "bed_type_factor_tcp": ml_stat_dict(predicted_bed_tcp_factor),
-            "bed_type_factor_st": ml_stat_dict(predicted_bed_st_factor),
-            "sensor_temperature": ml_stat_dict(predicted_sensor_temperature),
-            "offset": ml_stat_dict(predicted_offset),
-            "error": error,
-        }
-    return statistics
\ No newline at end of file
+        records, _, _ = cli_merge(cli_load(arguments.inputs))
+        factor_dict, categories, polynomial = cli_fit(records, arguments.mode, arguments.outlier_sample_min, arguments.outlier_deviation, arguments.category_ridge)
+        if arguments.command == "fit":
+            cli_respond_statistics(factor_dict, polynomial)
+            if arguments.static:
+                static_data = read_data(arguments.static)
+                if not static_data:
+                    raise SystemExit("DZOS: No Static Data Found!")
+                static_data.update({key: 0.0 for key in FACTOR_KEYS.values()})
+                static_data.update(factor_dict)
+                static_data["model_type"] = arguments.mode
+                write_data(arguments.static, static_data)
+                print(f"DZOS: Factors written to {arguments.static}")
+        else:
+            columns = cli_columns(records, factor_dict, categories, polynomial)
+            cli_export(arguments.output, columns)
+            print(f"DZOS: {len(columns['z_offset'])} rows, {len(columns)} columns -> {arguments.output}")
+
+
+if __name__ == "__main__":
+    main()